@@ -4,10 +4,14 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 import structlog
 
 from src.api.routes import appeals, health, payers
+from src.core.config import settings
 from src.core.database import init_db
+from src.integrations.llm import get_llm_client
 
 logger = structlog.get_logger()
 
@@ -17,14 +21,50 @@ async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     # Startup
     logger.info("Starting Prior Authorization Assistant API")
-    try:
-        await init_db()
-        logger.info("Database initialized")
-    except Exception as e:
-        logger.warning("Database initialization skipped", error=str(e))
+    if settings.database_init:
+        try:
+            await init_db()
+            logger.info("Database initialized")
+        except Exception as e:
+            logger.warning("Database initialization skipped", error=str(e))
+    else:
+        logger.info("Database initialization disabled")
     yield
     # Shutdown
     logger.info("Shutting down API")
+    if get_llm_client.cache_info().currsize:
+        await get_llm_client().aclose()
+    # Drop the providers holding the closed client so a later startup builds fresh ones
+    appeals.get_appeal_service.cache_clear()
+    get_llm_client.cache_clear()
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject an oversized upload from its Content-Length header.
+
+    Runs before FastAPI parses and spools the multipart body, so a clearly
+    oversized request is refused without being read. Chunked uploads (no
+    Content-Length) are still capped while the route reads the file.
+    """
+
+    def __init__(self, app: ASGIApp, path: str, max_bytes: int) -> None:
+        self.app = app
+        self.path = path
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] == self.path:
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_bytes:
+                        response = JSONResponse(
+                            {"detail": "File too large (max 10MB)"}, status_code=400
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
 
 
 app = FastAPI(
@@ -42,6 +82,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    path="/api/v1/appeals/upload",
+    max_bytes=appeals.MAX_UPLOAD_REQUEST_BYTES,
+)
+
 app.include_router(health.router, tags=["Health"])
 app.include_router(appeals.router, prefix="/api/v1", tags=["Appeals"])
 app.include_router(payers.router, prefix="/api/v1", tags=["Payers"])
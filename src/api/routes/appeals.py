@@ -1,7 +1,14 @@
 """Appeal generation endpoints."""
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from pydantic import BaseModel
+import re
+from collections.abc import AsyncIterator, Sequence
+from functools import lru_cache
+from typing import Annotated, Final
+
+import orjson
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, StringConstraints
 
 from src.core.models import AppealLetter, DenialExtraction, PatientContext
 from src.core.services import AppealGenerationService
@@ -10,6 +17,20 @@ from src.integrations.ocr import get_ocr_provider
 
 router = APIRouter()
 
+MIN_DENIAL_TEXT_LENGTH = 50
+MAX_DENIAL_TEXT_LENGTH = 200_000
+_SHORT_DENIAL_TEXT_DETAIL = f"Denial text must be at least {MIN_DENIAL_TEXT_LENGTH} characters"
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB limit
+# Largest upload request body, allowing for multipart framing and the other form fields
+MAX_UPLOAD_REQUEST_BYTES = MAX_UPLOAD_BYTES + 64 * 1024
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+_ALLOWED_CONTENT_TYPES: Final[frozenset[str]] = frozenset(
+    {"application/pdf", "image/png", "image/jpeg", "image/tiff"}
+)
+
+_split_csv_items = re.compile(r"\s*,\s*").split
+
 
 class AppealResponse(BaseModel):
     """Response model for generated appeal."""
@@ -17,31 +38,91 @@ class AppealResponse(BaseModel):
     appeal_id: str
     appeal_letter: str
     denial_info: DenialExtraction
-    required_documents: list[str]
+    required_documents: Sequence[str]
     confidence_score: float
 
 
+# Upper bound only, enforced by the model's core schema (built once, at class creation);
+# the lower bound is checked in the route so short input is a 400, not a 422
+DenialText = Annotated[str, StringConstraints(max_length=MAX_DENIAL_TEXT_LENGTH)]
+
+
 class TextAppealRequest(BaseModel):
     """Request for appeal generation from text input."""
 
-    denial_text: str
+    denial_text: DenialText
     patient_name: str | None = None
     procedure_code: str | None = None
     procedure_description: str | None = None
-    diagnosis_codes: list[str] | None = None
-    clinical_notes: str | None = None
-    prior_treatments: list[str] | None = None
+    diagnosis_codes: Annotated[list[str], Field(max_length=50)] | None = None
+    clinical_notes: Annotated[str, Field(max_length=20_000)] | None = None
+    prior_treatments: Annotated[list[str], Field(max_length=50)] | None = None
     treating_physician: str | None = None
 
 
+@lru_cache(maxsize=1)
 def get_appeal_service() -> AppealGenerationService:
-    """Create appeal service with dependencies."""
+    """Create the appeal service once and share it across requests."""
     return AppealGenerationService(
         ocr_provider=get_ocr_provider(),
         llm_client=get_llm_client(),
     )
 
 
+def _appeal_response(appeal: AppealLetter) -> AppealResponse:
+    """Build the API response from an already-validated appeal."""
+    return AppealResponse.model_construct(
+        appeal_id=appeal.id,
+        appeal_letter=appeal.letter_content,
+        denial_info=appeal.denial_extraction,
+        required_documents=appeal.required_attachments,
+        confidence_score=appeal.confidence_score,
+    )
+
+
+def _split_csv(value: str | None) -> list[str]:
+    """Split a comma-separated form field into trimmed, non-empty items."""
+    if not value:
+        return []
+    return [item for item in _split_csv_items(value.strip()) if item]
+
+
+async def _read_upload(upload: UploadFile) -> bytes:
+    """Read an upload in chunks, rejecting it as soon as it exceeds the size limit."""
+    if upload.size is not None and upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=400, detail="File too large (max 10MB)")
+
+    content = bytearray()
+    while chunk := await upload.read(_UPLOAD_CHUNK_BYTES):
+        content += chunk
+        if len(content) > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=400, detail="File too large (max 10MB)")
+    return bytes(content)
+
+
+def _text_request_context(request: TextAppealRequest) -> PatientContext | None:
+    """Validate a text request and build its patient context, if any."""
+    if len(request.denial_text) < MIN_DENIAL_TEXT_LENGTH:
+        raise HTTPException(status_code=400, detail=_SHORT_DENIAL_TEXT_DETAIL)
+
+    if not (request.patient_name or request.procedure_code):
+        return None
+    return PatientContext(
+        patient_name=request.patient_name or "Unknown",
+        procedure_code=request.procedure_code or "Unknown",
+        procedure_description=request.procedure_description,
+        diagnosis_codes=request.diagnosis_codes or [],
+        clinical_notes=request.clinical_notes,
+        prior_treatments=request.prior_treatments or [],
+        treating_physician=request.treating_physician,
+    )
+
+
+def _sse(event: str, data: bytes) -> bytes:
+    """Frame one server-sent event."""
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
 @router.post("/appeals/upload", response_model=AppealResponse)
 async def generate_appeal_from_document(
     denial_letter: UploadFile = File(..., description="PDF or image of denial letter"),
@@ -52,6 +133,7 @@ async def generate_appeal_from_document(
     clinical_notes: str | None = Form(None),
     prior_treatments: str | None = Form(None, description="Comma-separated list"),
     treating_physician: str | None = Form(None),
+    service: AppealGenerationService = Depends(get_appeal_service),
 ) -> AppealResponse:
     """
     Generate an appeal letter from an uploaded denial document.
@@ -60,21 +142,14 @@ async def generate_appeal_from_document(
     analyzes the denial and generates an appeal letter.
     """
     # Validate file type
-    if denial_letter.content_type not in [
-        "application/pdf",
-        "image/png",
-        "image/jpeg",
-        "image/tiff",
-    ]:
+    if denial_letter.content_type not in _ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=400,
             detail="File must be PDF, PNG, JPEG, or TIFF",
         )
 
     # Read file content
-    content = await denial_letter.read()
-    if len(content) > 10 * 1024 * 1024:  # 10MB limit
-        raise HTTPException(status_code=400, detail="File too large (max 10MB)")
+    content = await _read_upload(denial_letter)
 
     # Build patient context if provided
     patient_context = None
@@ -83,57 +158,35 @@ async def generate_appeal_from_document(
             patient_name=patient_name or "Unknown",
             procedure_code=procedure_code or "Unknown",
             procedure_description=procedure_description,
-            diagnosis_codes=diagnosis_codes.split(",") if diagnosis_codes else [],
+            diagnosis_codes=_split_csv(diagnosis_codes),
             clinical_notes=clinical_notes,
-            prior_treatments=prior_treatments.split(",") if prior_treatments else [],
+            prior_treatments=_split_csv(prior_treatments),
             treating_physician=treating_physician,
         )
 
     # Process through pipeline
-    service = get_appeal_service()
     try:
         appeal = await service.process_denial(content, patient_context)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process denial: {str(e)}")
 
-    return AppealResponse(
-        appeal_id=appeal.id,
-        appeal_letter=appeal.letter_content,
-        denial_info=appeal.denial_extraction,
-        required_documents=appeal.required_attachments,
-        confidence_score=appeal.confidence_score,
-    )
+    return _appeal_response(appeal)
 
 
 @router.post("/appeals/text", response_model=AppealResponse)
-async def generate_appeal_from_text(request: TextAppealRequest) -> AppealResponse:
+async def generate_appeal_from_text(
+    request: TextAppealRequest,
+    service: AppealGenerationService = Depends(get_appeal_service),
+) -> AppealResponse:
     """
     Generate an appeal letter from denial text.
 
     Use this endpoint when you already have the denial letter text
     (e.g., from copy-paste or a different OCR system).
     """
-    if not request.denial_text or len(request.denial_text) < 50:
-        raise HTTPException(
-            status_code=400,
-            detail="Denial text must be at least 50 characters",
-        )
-
-    # Build patient context if provided
-    patient_context = None
-    if request.patient_name or request.procedure_code:
-        patient_context = PatientContext(
-            patient_name=request.patient_name or "Unknown",
-            procedure_code=request.procedure_code or "Unknown",
-            procedure_description=request.procedure_description,
-            diagnosis_codes=request.diagnosis_codes or [],
-            clinical_notes=request.clinical_notes,
-            prior_treatments=request.prior_treatments or [],
-            treating_physician=request.treating_physician,
-        )
+    patient_context = _text_request_context(request)
 
     # Process through pipeline (skip OCR)
-    service = get_appeal_service()
     try:
         appeal = await service.process_denial_from_text(
             request.denial_text,
@@ -142,21 +195,57 @@ async def generate_appeal_from_text(request: TextAppealRequest) -> AppealRespons
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process denial: {str(e)}")
 
-    return AppealResponse(
-        appeal_id=appeal.id,
-        appeal_letter=appeal.letter_content,
-        denial_info=appeal.denial_extraction,
-        required_documents=appeal.required_attachments,
-        confidence_score=appeal.confidence_score,
+    return _appeal_response(appeal)
+
+
+@router.post("/appeals/text/stream", response_class=StreamingResponse)
+async def stream_appeal_from_text(
+    request: TextAppealRequest,
+    service: AppealGenerationService = Depends(get_appeal_service),
+) -> StreamingResponse:
+    """
+    Generate an appeal letter from denial text, streamed as server-sent events.
+
+    Emits one ``appeal`` event with the response metadata (``appeal_letter``
+    empty), a ``token`` event per chunk of letter text as the LLM produces it,
+    then ``done`` — or ``error`` if generation fails part-way.
+    """
+    patient_context = _text_request_context(request)
+
+    async def events() -> AsyncIterator[bytes]:
+        appeal_id = None
+        try:
+            async for item in service.stream_denial_from_text(
+                request.denial_text,
+                patient_context,
+            ):
+                if isinstance(item, str):
+                    yield _sse("token", orjson.dumps(item))
+                else:
+                    appeal_id = item.id
+                    yield _sse("appeal", _appeal_response(item).model_dump_json().encode())
+        except Exception as e:
+            yield _sse("error", orjson.dumps({"detail": f"Failed to process denial: {e}"}))
+            return
+        yield _sse("done", orjson.dumps({"appeal_id": appeal_id}))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
-@router.get("/appeals/{appeal_id}")
-async def get_appeal(appeal_id: str) -> dict[str, str]:
+@router.get("/appeals/{appeal_id}", response_model=None)
+async def get_appeal(appeal_id: str) -> Response:
     """
     Retrieve a previously generated appeal.
 
     Note: Currently returns not_found as persistence is not yet implemented.
     """
     # TODO: Implement appeal retrieval from database
-    return {"appeal_id": appeal_id, "status": "not_found"}
+    # Serialized directly: no response-model validation on the miss path
+    return Response(
+        content=orjson.dumps({"appeal_id": appeal_id, "status": "not_found"}),
+        media_type="application/json",
+    )
@@ -1,6 +1,9 @@
 """Health check endpoints."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
+
+from src.core.config import settings
+from src.core.database import engine
 
 router = APIRouter()
 
@@ -9,3 +12,11 @@ router = APIRouter()
 async def health_check() -> dict[str, str]:
     """Basic health check endpoint."""
     return {"status": "healthy"}
+
+
+@router.get("/debug/pool")
+async def pool_status() -> dict[str, str]:
+    """Report database connection pool usage (debug mode only)."""
+    if not settings.debug:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {"pool": engine.pool.status()}
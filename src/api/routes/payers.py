@@ -1,12 +1,47 @@
 """Payer information and rules endpoints."""
 
-from fastapi import APIRouter
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
 
 from src.core.repositories import generate_payer_seed_data
 
 router = APIRouter()
 
+_PAYERS = generate_payer_seed_data()
+
+
+def _build_payer_index(
+    payers: Iterable[Mapping[str, Any]],
+) -> tuple[dict[str, Mapping[str, Any]], tuple[tuple[str, Mapping[str, Any]], ...]]:
+    """Index payers by lowercase name and alias, for exact and partial-name lookups."""
+    index: dict[str, Mapping[str, Any]] = {}
+    keys: list[tuple[str, Mapping[str, Any]]] = []
+    for payer in payers:
+        for key in (payer["name"], *payer.get("aliases", [])):
+            index.setdefault(key.lower(), payer)
+            keys.append((key.lower(), payer))
+    return index, tuple(keys)
+
+
+# Lowercase name/alias -> payer, and (lowercase name/alias, payer) pairs in seed order
+_PAYER_INDEX, _PAYER_KEYS = _build_payer_index(_PAYERS)
+
+
+def _find_payer(payer_name: str) -> Mapping[str, Any] | None:
+    """Find a payer by exact name/alias, falling back to a partial match."""
+    query = payer_name.lower()
+    payer = _PAYER_INDEX.get(query)
+    if payer is not None:
+        return payer
+    for key, payer in _PAYER_KEYS:
+        if query in key:
+            return payer
+    return None
+
 
 class PayerInfo(BaseModel):
     """Payer information response model."""
@@ -25,8 +60,42 @@ class PayerListResponse(BaseModel):
     payers: list[PayerInfo]
 
 
+def _payer_list_json() -> bytes:
+    """Serialize the (static) payer list."""
+    payers = [
+        PayerInfo.model_construct(
+            id=p["id"],
+            name=p["name"],
+            aliases=p["aliases"],
+            appeals_phone=p.get("appeals_phone"),
+            appeal_deadline_days=p.get("appeal_deadline_days", 180),
+            medical_necessity_requirements=p.get("medical_necessity_requirements", {}),
+        )
+        for p in _PAYERS
+    ]
+    return orjson.dumps(PayerListResponse.model_construct(payers=payers).model_dump())
+
+
+def _payer_requirements_json(p: Mapping[str, Any]) -> bytes:
+    """Serialize the (static) requirements for one payer."""
+    return orjson.dumps(
+        {
+            "payer": p["name"],
+            "appeal_deadline_days": p.get("appeal_deadline_days", 180),
+            "appeals_phone": p.get("appeals_phone"),
+            "medical_necessity": p.get("medical_necessity_requirements", {}),
+            "step_therapy": p.get("step_therapy_requirements", {}),
+            "documentation": p.get("documentation_requirements", {}),
+        }
+    )
+
+
+_PAYER_LIST_JSON = _payer_list_json()
+_PAYER_REQUIREMENTS_JSON = {p["id"]: _payer_requirements_json(p) for p in _PAYERS}
+
+
 @router.get("/payers", response_model=PayerListResponse)
-async def list_payers() -> PayerListResponse:
+async def list_payers() -> Response:
     """
     List all known insurance payers with their appeal requirements.
 
@@ -38,23 +107,11 @@ async def list_payers() -> PayerListResponse:
     """
     # For now, return seed data directly
     # In production, this would query the database
-    payers = [
-        PayerInfo(
-            id=p["id"],
-            name=p["name"],
-            aliases=p["aliases"],
-            appeals_phone=p.get("appeals_phone"),
-            appeal_deadline_days=p.get("appeal_deadline_days", 180),
-            medical_necessity_requirements=p.get("medical_necessity_requirements", {}),
-        )
-        for p in generate_payer_seed_data()
-    ]
-
-    return PayerListResponse(payers=payers)
+    return Response(content=_PAYER_LIST_JSON, media_type="application/json")
 
 
-@router.get("/payers/{payer_name}/requirements")
-async def get_payer_requirements(payer_name: str) -> dict:
+@router.get("/payers/{payer_name}/requirements", response_model=None)
+async def get_payer_requirements(payer_name: str) -> Response | dict[str, str]:
     """
     Get specific requirements for a payer.
 
@@ -62,19 +119,9 @@ async def get_payer_requirements(payer_name: str) -> dict:
     based on the denial reason type.
     """
     # Find payer in seed data
-    payers = generate_payer_seed_data()
-    for p in payers:
-        if payer_name.lower() in p["name"].lower() or any(
-            payer_name.lower() in alias.lower() for alias in p.get("aliases", [])
-        ):
-            return {
-                "payer": p["name"],
-                "appeal_deadline_days": p.get("appeal_deadline_days", 180),
-                "appeals_phone": p.get("appeals_phone"),
-                "medical_necessity": p.get("medical_necessity_requirements", {}),
-                "step_therapy": p.get("step_therapy_requirements", {}),
-                "documentation": p.get("documentation_requirements", {}),
-            }
+    p = _find_payer(payer_name)
+    if p is not None:
+        return Response(content=_PAYER_REQUIREMENTS_JSON[p["id"]], media_type="application/json")
 
     return {
         "error": "Payer not found",
@@ -15,9 +15,14 @@ class Settings(BaseSettings):
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_region: str = "us-east-1"
+    textract_s3_bucket: str = ""  # Staging bucket for multi-page PDFs; empty keeps sync OCR only
 
     # Database
     database_url: str = "postgresql+asyncpg://localhost:5432/prior_auth"
+    database_init: bool = True  # Run create_all on startup; disable on all but one worker
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle_seconds: int = 300  # Replace idle server connections before they go stale
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
@@ -27,5 +32,16 @@ class Settings(BaseSettings):
     debug: bool = True
     log_level: str = "INFO"
 
+    # LLM
+    llm_max_concurrency: int = 8  # In-flight calls per fan-out; size to the account rate limit
+
+    # Caching
+    appeal_cache_size: int = 1024
+    appeal_cache_ttl_seconds: int = 3600
+    payer_cache_size: int = 256
+    extraction_cache_size: int = 1024
+    ocr_cache_size: int = 256
+    payer_cache_ttl_seconds: int = 300
+
 
 settings = Settings()
@@ -2,6 +2,7 @@
 
 from collections.abc import AsyncGenerator
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -11,13 +12,19 @@ from src.core.config import settings
 class Base(DeclarativeBase):
     """Base class for SQLAlchemy models."""
 
-    pass
+    # Fetch server-generated timestamps with RETURNING rather than lazy-loading them
+    __mapper_args__ = {"eager_defaults": True}
 
 
 engine = create_async_engine(
     settings.database_url,
     echo=settings.debug,
     pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle_seconds,
+    # Bulk inserts are sent as multi-VALUES statements of up to this many rows
+    insertmanyvalues_page_size=1000,
 )
 
 async_session_maker = async_sessionmaker(
@@ -41,6 +48,9 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def init_db() -> None:
-    """Initialize database tables."""
+    """Initialize database tables (DDL runs on the connection's worker via run_sync)."""
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Required by the trigram index on payers.name
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await conn.run_sync(Base.metadata.create_all)
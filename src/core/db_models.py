@@ -3,24 +3,56 @@
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import JSON, DateTime, Enum, Float, ForeignKey, String, Text
+from sqlalchemy import (
+    JSON,
+    Computed,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
 from src.core.models import DenialReason
 
+# JSONB on PostgreSQL (indexable with GIN), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Store enum values as VARCHAR + CHECK rather than a native PostgreSQL enum type
+DenialReasonType = Enum(
+    DenialReason,
+    native_enum=False,
+    create_constraint=True,
+    values_callable=lambda e: [member.value for member in e],
+)
+
 
 class AppealRecord(Base):
     """Persisted appeal record."""
 
     __tablename__ = "appeals"
+    __table_args__ = (
+        Index("ix_appeals_payer_status", "payer_id", "status"),
+        Index("ix_appeals_created_at_id", "created_at", "id"),  # keyset pagination
+        Index("ix_appeals_procedure_codes", "procedure_codes", postgresql_using="gin"),
+        Index("ix_appeals_diagnosis_codes", "diagnosis_codes", postgresql_using="gin"),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
-    )
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )  # indexed via ix_appeals_created_at_id
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
     )
 
     # Patient info
@@ -31,21 +63,21 @@ class AppealRecord(Base):
     payer_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
     payer_id: Mapped[str | None] = mapped_column(
         String(36), ForeignKey("payers.id"), nullable=True
-    )
+    )  # indexed via ix_appeals_payer_status
     denial_reason: Mapped[str] = mapped_column(
-        Enum(DenialReason), default=DenialReason.OTHER, nullable=False
+        DenialReasonType, default=DenialReason.OTHER, nullable=False, index=True
     )
     denial_reason_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     denial_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     claim_number: Mapped[str | None] = mapped_column(String(100), nullable=True)
 
     # Procedure info
-    procedure_codes: Mapped[list[str]] = mapped_column(JSON, default=list)
-    diagnosis_codes: Mapped[list[str]] = mapped_column(JSON, default=list)
+    procedure_codes: Mapped[list[str]] = mapped_column(JSONType, default=list)
+    diagnosis_codes: Mapped[list[str]] = mapped_column(JSONType, default=list)
 
     # Generated appeal
     appeal_letter: Mapped[str] = mapped_column(Text, nullable=False)
-    required_documents: Mapped[list[str]] = mapped_column(JSON, default=list)
+    required_documents: Mapped[list[str]] = mapped_column(JSONType, default=list)
     confidence_score: Mapped[float] = mapped_column(Float, default=0.0)
 
     # Raw data
@@ -53,7 +85,7 @@ class AppealRecord(Base):
 
     # Status tracking
     status: Mapped[str] = mapped_column(
-        String(50), default="generated", nullable=False
+        String(50), default="generated", nullable=False, index=True
     )  # generated, submitted, approved, denied
 
     # Relationships
@@ -64,10 +96,26 @@ class PayerRecord(Base):
     """Insurance payer information and rules."""
 
     __tablename__ = "payers"
+    __table_args__ = (
+        Index("ix_payers_aliases", "aliases", postgresql_using="gin"),
+        # Trigram index so name ILIKE '%...%' lookups avoid a sequential scan
+        Index(
+            "ix_payers_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
-    aliases: Mapped[list[str]] = mapped_column(JSON, default=list)  # Alternative names
+    # Lowercased alphanumerics only; must match repositories.normalize_payer_name
+    name_normalized: Mapped[str] = mapped_column(
+        String(255),
+        Computed("lower(regexp_replace(name, '[^a-zA-Z0-9]+', '', 'g'))", persisted=True),
+        index=True,
+    )
+    aliases: Mapped[list[str]] = mapped_column(JSONType, default=list)  # Alternative names
 
     # Contact info
     appeals_address: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -80,25 +128,22 @@ class PayerRecord(Base):
     expedited_review_available: Mapped[bool] = mapped_column(default=True)
 
     # Rules and requirements (JSON for flexibility)
-    medical_necessity_requirements: Mapped[dict[str, Any]] = mapped_column(
-        JSON, default=dict
-    )
-    step_therapy_requirements: Mapped[dict[str, Any]] = mapped_column(
-        JSON, default=dict
-    )
-    documentation_requirements: Mapped[dict[str, Any]] = mapped_column(
-        JSON, default=dict
-    )
+    medical_necessity_requirements: Mapped[dict[str, Any]] = mapped_column(JSONType, default=dict)
+    step_therapy_requirements: Mapped[dict[str, Any]] = mapped_column(JSONType, default=dict)
+    documentation_requirements: Mapped[dict[str, Any]] = mapped_column(JSONType, default=dict)
 
     # Statistics (updated over time)
     total_appeals: Mapped[int] = mapped_column(default=0)
     successful_appeals: Mapped[int] = mapped_column(default=0)
 
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
     )
 
     # Relationships
@@ -112,27 +157,25 @@ class PayerRuleRecord(Base):
     __tablename__ = "payer_rules"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True)
-    payer_id: Mapped[str] = mapped_column(String(36), ForeignKey("payers.id"))
+    payer_id: Mapped[str] = mapped_column(String(36), ForeignKey("payers.id"), index=True)
 
     # Rule applicability
     procedure_code: Mapped[str | None] = mapped_column(String(20), nullable=True)
     diagnosis_code: Mapped[str | None] = mapped_column(String(20), nullable=True)
-    denial_reason: Mapped[str | None] = mapped_column(
-        Enum(DenialReason), nullable=True
-    )
+    denial_reason: Mapped[str | None] = mapped_column(DenialReasonType, nullable=True)
 
     # Rule content
     rule_name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text, nullable=True)
-    required_documentation: Mapped[list[str]] = mapped_column(JSON, default=list)
-    appeal_tips: Mapped[list[str]] = mapped_column(JSON, default=list)
+    required_documentation: Mapped[list[str]] = mapped_column(JSONType, default=list)
+    appeal_tips: Mapped[list[str]] = mapped_column(JSONType, default=list)
 
     # Effectiveness tracking
     times_used: Mapped[int] = mapped_column(default=0)
     success_count: Mapped[int] = mapped_column(default=0)
 
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=datetime.utcnow, nullable=False
+        DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     # Relationships
@@ -1,9 +1,11 @@
 """Domain models for Prior Authorization."""
 
+from collections.abc import Sequence
 from datetime import datetime
 from enum import Enum
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 
 class DenialReason(str, Enum):
@@ -34,6 +36,51 @@ class DenialExtraction(BaseModel):
     appeal_deadline: datetime | None = None
     raw_text: str = ""
 
+    @field_validator("denial_reason", mode="before")
+    @classmethod
+    def _coerce_denial_reason(cls, value: Any) -> Any:
+        """Map missing or unrecognized reasons to OTHER rather than failing validation."""
+        try:
+            return DenialReason(value)
+        except ValueError:
+            return DenialReason.OTHER
+
+    @field_validator("denial_date", "appeal_deadline", mode="before")
+    @classmethod
+    def _parse_date(cls, value: Any) -> Any:
+        """Parse ISO dates, dropping values that are not one (LLM output varies)."""
+        if not isinstance(value, str):
+            return value
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    @field_validator("procedure_codes", "diagnosis_codes", mode="before")
+    @classmethod
+    def _none_as_empty(cls, value: Any) -> Any:
+        """Treat a null code list as empty."""
+        return [] if value is None else value
+
+    def to_flag_bits(self) -> int:
+        """
+        Pack which fields were extracted into a bitmask (bit 0 = payer_name).
+
+        Bit order: payer_name, denial_date, non-OTHER denial_reason,
+        denial_reason_text, procedure_codes, diagnosis_codes, claim_number,
+        appeal_deadline.
+        """
+        return (
+            bool(self.payer_name)
+            | bool(self.denial_date) << 1
+            | (self.denial_reason is not DenialReason.OTHER) << 2
+            | bool(self.denial_reason_text) << 3
+            | bool(self.procedure_codes) << 4
+            | bool(self.diagnosis_codes) << 5
+            | bool(self.claim_number) << 6
+            | bool(self.appeal_deadline) << 7
+        )
+
 
 class AppealLetter(BaseModel):
     """Generated appeal letter with metadata."""
@@ -41,7 +88,7 @@ class AppealLetter(BaseModel):
     id: str
     denial_extraction: DenialExtraction
     letter_content: str
-    required_attachments: list[str]
+    required_attachments: Sequence[str]
     generated_at: datetime
     confidence_score: float
 
@@ -1,14 +1,160 @@
 """Repository layer for database operations."""
 
+import re
 import uuid
+from collections.abc import Iterable, Mapping, Sequence
+from copy import deepcopy
 from datetime import datetime
+from functools import cache
+from types import MappingProxyType
+from typing import Any, TypeVar
 
-from sqlalchemy import select
+from cachetools import TTLCache
+from sqlalchemy import (
+    BindParameter,
+    ColumnElement,
+    String,
+    bindparam,
+    cast,
+    insert,
+    inspect,
+    or_,
+    select,
+    tuple_,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    contains_eager,
+    load_only,
+    make_transient_to_detached,
+    raiseload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.core.db_models import AppealRecord, PayerRecord, PayerRuleRecord
+from src.core.config import settings
+from src.core.database import Base
+from src.core.db_models import AppealRecord, DenialReasonType, PayerRecord, PayerRuleRecord
 from src.core.models import AppealLetter, DenialReason
 
+# Payers and their rules change rarely; serve repeat lookups from process memory.
+# The caches hold detached snapshots (see _snapshot), never a session's own
+# instances; each hit merges a fresh snapshot into the caller's session with
+# session.merge(load=False), so no two requests share an instance. Writes through
+# these repositories evict the affected entries in this process only, so changes
+# made elsewhere (other workers, direct SQL) can be served stale for up to
+# payer_cache_ttl_seconds.
+_payer_id_by_name: TTLCache[str, str] = TTLCache(
+    maxsize=settings.payer_cache_size, ttl=settings.payer_cache_ttl_seconds
+)
+_payer_by_id: TTLCache[str, PayerRecord] = TTLCache(
+    maxsize=settings.payer_cache_size, ttl=settings.payer_cache_ttl_seconds
+)
+_rules_by_criteria: TTLCache[
+    tuple[str, str | None, str | None, DenialReason | None], list[PayerRuleRecord]
+] = TTLCache(maxsize=settings.payer_cache_size, ttl=settings.payer_cache_ttl_seconds)
+
+# Columns a list view needs; skips the large letter/denial TEXT and JSON columns
+_APPEAL_LIST_COLUMNS = (
+    AppealRecord.id,
+    AppealRecord.payer_name,
+    AppealRecord.denial_reason,
+    AppealRecord.status,
+    AppealRecord.created_at,
+)
+
+
+_R = TypeVar("_R", bound=Base)
+
+
+def _snapshot(record: _R, **relationships: Any) -> _R:
+    """
+    Copy a loaded record's column values into a new detached instance.
+
+    The copy shares no state (not even JSON lists/dicts) with the session that
+    loaded the record. Relationships to keep are passed as (already snapshotted)
+    values; any others are left unloaded.
+    """
+    columns = inspect(record).mapper.column_attrs
+    snapshot = type(record)(**{attr.key: deepcopy(getattr(record, attr.key)) for attr in columns})
+    for key, value in relationships.items():
+        set_committed_value(snapshot, key, value)
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def _payer_snapshot(payer: PayerRecord) -> PayerRecord:
+    """Detached copy of a payer together with its (loaded) rules."""
+    return _snapshot(payer, rules=[_snapshot(rule) for rule in payer.rules])
+
+
+def _rule_snapshot(rule: PayerRuleRecord) -> PayerRuleRecord:
+    """Detached copy of a rule together with its (loaded) payer."""
+    return _snapshot(rule, payer=_snapshot(rule.payer))
+
+
+def _evict_payer_rules(payer_id: str) -> None:
+    """Drop a payer's cached rule lists; each rule snapshot embeds a copy of the payer."""
+    for key in [key for key in _rules_by_criteria if key[0] == payer_id]:
+        _rules_by_criteria.pop(key, None)
+
+
+def _optional_match(column: Any, param: BindParameter[Any]) -> ColumnElement[bool]:
+    """Match rows where the column equals the parameter, is NULL, or the parameter is None."""
+    return or_(cast(param, String).is_(None), column == param, column.is_(None))
+
+
+_procedure_code = bindparam("procedure_code", type_=String(20))
+_diagnosis_code = bindparam("diagnosis_code", type_=String(20))
+_denial_reason = bindparam("denial_reason", type_=DenialReasonType)
+
+# One statement shape for every filter combination, so the compiled form and the
+# asyncpg prepared statement are reused; a None parameter disables its filter.
+# Payers load in one IN query; any other lazy load raises (N+1 guard).
+_MATCHING_RULES_STMT = (
+    select(PayerRuleRecord)
+    .options(selectinload(PayerRuleRecord.payer), raiseload("*"))
+    .where(
+        PayerRuleRecord.payer_id == bindparam("payer_id"),
+        _optional_match(PayerRuleRecord.procedure_code, _procedure_code),
+        _optional_match(PayerRuleRecord.diagnosis_code, _diagnosis_code),
+        _optional_match(PayerRuleRecord.denial_reason, _denial_reason),
+    )
+)
+
+_non_alphanumeric = re.compile(r"[^a-z0-9]+")
+
+# Rows per bulk INSERT round-trip (matches the engine's insertmanyvalues_page_size)
+_BULK_PAGE_SIZE = 1000
+
+
+def _to_row_dict(appeal: AppealLetter) -> dict[str, Any]:
+    """Map an appeal to AppealRecord column values."""
+    denial = appeal.denial_extraction
+    return {
+        "id": appeal.id,
+        "patient_name": None,  # Set from context if available
+        "member_id": denial.member_id,
+        "payer_name": denial.payer_name,
+        "denial_reason": denial.denial_reason,
+        "denial_reason_text": denial.denial_reason_text,
+        "denial_date": denial.denial_date,
+        "claim_number": denial.claim_number,
+        "procedure_codes": denial.procedure_codes,
+        "diagnosis_codes": denial.diagnosis_codes,
+        "appeal_letter": appeal.letter_content,
+        "required_documents": appeal.required_attachments,
+        "confidence_score": appeal.confidence_score,
+        "denial_text": denial.raw_text,
+        "status": "generated",
+    }
+
+
+def normalize_payer_name(name: str) -> str:
+    """Normalize a payer name the same way as the payers.name_normalized column."""
+    return _non_alphanumeric.sub("", name.lower())
+
 
 class AppealRepository:
     """Repository for appeal records."""
@@ -18,28 +164,21 @@ class AppealRepository:
 
     async def save(self, appeal: AppealLetter) -> AppealRecord:
         """Save an appeal to the database."""
-        record = AppealRecord(
-            id=appeal.id,
-            patient_name=None,  # Set from context if available
-            member_id=appeal.denial_extraction.member_id,
-            payer_name=appeal.denial_extraction.payer_name,
-            denial_reason=appeal.denial_extraction.denial_reason,
-            denial_reason_text=appeal.denial_extraction.denial_reason_text,
-            denial_date=appeal.denial_extraction.denial_date,
-            claim_number=appeal.denial_extraction.claim_number,
-            procedure_codes=appeal.denial_extraction.procedure_codes,
-            diagnosis_codes=appeal.denial_extraction.diagnosis_codes,
-            appeal_letter=appeal.letter_content,
-            required_documents=appeal.required_attachments,
-            confidence_score=appeal.confidence_score,
-            denial_text=appeal.denial_extraction.raw_text,
-            status="generated",
-        )
+        record = AppealRecord(**_to_row_dict(appeal))
 
         self.session.add(record)
-        await self.session.flush()
         return record
 
+    async def save_many(self, appeals: Sequence[AppealLetter]) -> list[str]:
+        """Insert many appeals with INSERT ... RETURNING, in pages of _BULK_PAGE_SIZE."""
+        stmt = insert(AppealRecord).returning(AppealRecord.id, sort_by_parameter_order=True)
+        ids: list[str] = []
+        for start in range(0, len(appeals), _BULK_PAGE_SIZE):
+            rows = [_to_row_dict(a) for a in appeals[start : start + _BULK_PAGE_SIZE]]
+            result = await self.session.execute(stmt, rows)
+            ids.extend(result.scalars().all())
+        return ids
+
     async def get_by_id(self, appeal_id: str) -> AppealRecord | None:
         """Retrieve an appeal by ID."""
         result = await self.session.execute(
@@ -47,22 +186,52 @@ class AppealRepository:
         )
         return result.scalar_one_or_none()
 
-    async def list_recent(self, limit: int = 20) -> list[AppealRecord]:
-        """List recent appeals."""
-        result = await self.session.execute(
+    async def list_recent(
+        self,
+        limit: int = 20,
+        cursor: tuple[datetime, str] | None = None,
+    ) -> tuple[list[AppealRecord], tuple[datetime, str] | None]:
+        """
+        List recent appeals, newest first, using keyset pagination.
+
+        Only the list-view columns are loaded; the letter and denial text are not.
+
+        Pass the returned cursor back to fetch the next page; it is None
+        once there are no more rows.
+        """
+        # One row past the page tells whether another page exists
+        query = (
             select(AppealRecord)
-            .order_by(AppealRecord.created_at.desc())
-            .limit(limit)
+            .options(load_only(*_APPEAL_LIST_COLUMNS, raiseload=True), raiseload("*"))
+            .order_by(AppealRecord.created_at.desc(), AppealRecord.id.desc())
+            .limit(limit + 1)
         )
-        return list(result.scalars().all())
+        if cursor is not None:
+            query = query.where(tuple_(AppealRecord.created_at, AppealRecord.id) < cursor)
+
+        result = await self.session.execute(query)
+        records = list(result.scalars().all())
+        next_cursor = None
+        if len(records) > limit:
+            del records[limit:]
+            next_cursor = (records[-1].created_at, records[-1].id)
+        return records, next_cursor
 
     async def update_status(self, appeal_id: str, status: str) -> AppealRecord | None:
-        """Update appeal status."""
-        record = await self.get_by_id(appeal_id)
-        if record:
-            record.status = status
-            await self.session.flush()
-        return record
+        """
+        Update appeal status in one UPDATE ... RETURNING round-trip.
+
+        populate_existing refreshes the record from the returned row even if
+        this session already holds it, so the result always has the new status.
+        """
+        result = await self.session.execute(
+            update(AppealRecord)
+            .where(AppealRecord.id == appeal_id)
+            .values(status=status)
+            .returning(AppealRecord),
+            execution_options={"synchronize_session": False, "populate_existing": True},
+        )
+        return result.scalar_one_or_none()
 
 
 class PayerRepository:
@@ -73,12 +242,35 @@ class PayerRepository:
 
     async def get_by_name(self, name: str) -> PayerRecord | None:
         """Find payer by name or alias."""
-        # First try exact match
-        result = await self.session.execute(
-            select(PayerRecord).where(PayerRecord.name.ilike(f"%{name}%"))
+        cache_key = name.strip().lower()
+        payer_id = _payer_id_by_name.get(cache_key)
+        if payer_id is not None and (cached := _payer_by_id.get(payer_id)) is not None:
+            return await self.session.merge(_payer_snapshot(cached), load=False)
+
+        # Rules come back on the same joined rows as the payer
+        query = (
+            select(PayerRecord)
+            .outerjoin(PayerRecord.rules)
+            .options(contains_eager(PayerRecord.rules))
         )
-        payer = result.scalar_one_or_none()
+
+        # First try an exact normalized-name match (b-tree index seek)
+        payer = None
+        normalized = normalize_payer_name(name)
+        if normalized:
+            result = await self.session.execute(
+                query.where(PayerRecord.name_normalized == normalized)
+            )
+            payer = result.unique().scalar_one_or_none()
+
+        # Then a substring match (trigram index)
+        if payer is None:
+            result = await self.session.execute(query.where(PayerRecord.name.ilike(f"%{name}%")))
+            payer = result.unique().scalar_one_or_none()
+
         if payer:
+            _payer_id_by_name[cache_key] = payer.id
+            _payer_by_id[payer.id] = _payer_snapshot(payer)
             return payer
 
         # TODO: Search aliases with JSON contains
@@ -86,34 +278,49 @@ class PayerRepository:
 
     async def get_by_id(self, payer_id: str) -> PayerRecord | None:
         """Get payer by ID."""
+        cached = _payer_by_id.get(payer_id)
+        if cached is not None:
+            return await self.session.merge(_payer_snapshot(cached), load=False)
+
+        # Load rules too, so cached payers look the same whichever lookup filled them
         result = await self.session.execute(
-            select(PayerRecord).where(PayerRecord.id == payer_id)
+            select(PayerRecord)
+            .options(selectinload(PayerRecord.rules))
+            .where(PayerRecord.id == payer_id)
         )
-        return result.scalar_one_or_none()
+        payer = result.scalar_one_or_none()
+        if payer:
+            _payer_by_id[payer_id] = _payer_snapshot(payer)
+        return payer
 
     async def list_all(self) -> list[PayerRecord]:
         """List all payers."""
-        result = await self.session.execute(
-            select(PayerRecord).order_by(PayerRecord.name)
-        )
+        result = await self.session.execute(select(PayerRecord).order_by(PayerRecord.name))
         return list(result.scalars().all())
 
     async def create(self, payer: PayerRecord) -> PayerRecord:
         """Create a new payer record."""
         self.session.add(payer)
-        await self.session.flush()
+        _payer_id_by_name.clear()
         return payer
 
-    async def increment_appeal_count(
-        self, payer_id: str, successful: bool = False
-    ) -> None:
+    async def bulk_create(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Insert many payers in one multi-VALUES statement (e.g. seed data)."""
+        await self.session.execute(insert(PayerRecord), [dict(row) for row in rows])
+        _payer_id_by_name.clear()
+
+    async def increment_appeal_count(self, payer_id: str, successful: bool = False) -> None:
         """Increment appeal statistics for a payer."""
-        payer = await self.get_by_id(payer_id)
-        if payer:
-            payer.total_appeals += 1
-            if successful:
-                payer.successful_appeals += 1
-            await self.session.flush()
+        await self.session.execute(
+            update(PayerRecord)
+            .where(PayerRecord.id == payer_id)
+            .values(
+                total_appeals=PayerRecord.total_appeals + 1,
+                successful_appeals=PayerRecord.successful_appeals + int(successful),
+            )
+        )
+        _payer_by_id.pop(payer_id, None)
+        _evict_payer_rules(payer_id)
 
 
 class PayerRuleRepository:
@@ -130,50 +337,48 @@ class PayerRuleRepository:
         denial_reason: DenialReason | None = None,
     ) -> list[PayerRuleRecord]:
         """Find rules matching the given criteria."""
-        query = select(PayerRuleRecord).where(PayerRuleRecord.payer_id == payer_id)
-
-        # Add optional filters
-        if procedure_code:
-            query = query.where(
-                (PayerRuleRecord.procedure_code == procedure_code)
-                | (PayerRuleRecord.procedure_code.is_(None))
-            )
-        if diagnosis_code:
-            query = query.where(
-                (PayerRuleRecord.diagnosis_code == diagnosis_code)
-                | (PayerRuleRecord.diagnosis_code.is_(None))
-            )
-        if denial_reason:
-            query = query.where(
-                (PayerRuleRecord.denial_reason == denial_reason)
-                | (PayerRuleRecord.denial_reason.is_(None))
-            )
+        cache_key = (payer_id, procedure_code, diagnosis_code, denial_reason)
+        cached = _rules_by_criteria.get(cache_key)
+        if cached is not None:
+            return [await self.session.merge(_rule_snapshot(rule), load=False) for rule in cached]
 
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+        result = await self.session.execute(
+            _MATCHING_RULES_STMT,
+            {
+                "payer_id": payer_id,
+                "procedure_code": procedure_code or None,
+                "diagnosis_code": diagnosis_code or None,
+                "denial_reason": denial_reason or None,
+            },
+        )
+        rules = list(result.scalars().all())
+        _rules_by_criteria[cache_key] = [_rule_snapshot(rule) for rule in rules]
+        return rules
 
     async def create(self, rule: PayerRuleRecord) -> PayerRuleRecord:
         """Create a new payer rule."""
         self.session.add(rule)
-        await self.session.flush()
+        _rules_by_criteria.clear()
+        _payer_by_id.pop(rule.payer_id, None)
         return rule
 
     async def increment_usage(self, rule_id: str, successful: bool = False) -> None:
         """Track rule usage."""
-        result = await self.session.execute(
-            select(PayerRuleRecord).where(PayerRuleRecord.id == rule_id)
+        _rules_by_criteria.clear()
+        await self.session.execute(
+            update(PayerRuleRecord)
+            .where(PayerRuleRecord.id == rule_id)
+            .values(
+                times_used=PayerRuleRecord.times_used + 1,
+                success_count=PayerRuleRecord.success_count + int(successful),
+            )
         )
-        rule = result.scalar_one_or_none()
-        if rule:
-            rule.times_used += 1
-            if successful:
-                rule.success_count += 1
-            await self.session.flush()
 
 
-def generate_payer_seed_data() -> list[dict]:
-    """Generate seed data for common payers."""
-    return [
+@cache
+def generate_payer_seed_data() -> tuple[Mapping[str, Any], ...]:
+    """Generate seed data for common payers (built once, read-only)."""
+    payers = [
         {
             "id": str(uuid.uuid4()),
             "name": "Blue Cross Blue Shield",
@@ -285,3 +490,4 @@ def generate_payer_seed_data() -> list[dict]:
             },
         },
     ]
+    return tuple(MappingProxyType(p) for p in payers)
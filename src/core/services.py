@@ -1,11 +1,20 @@
 """Core services for appeal generation pipeline."""
 
+import asyncio
+import hashlib
+import os
+import re
 import uuid
-from datetime import datetime
+from collections import Counter
+from collections.abc import AsyncIterator, Sequence
+from datetime import UTC, datetime
+from typing import Literal
 
 import structlog
+from cachetools import TTLCache
 
-from src.core.models import AppealLetter, DenialExtraction, PatientContext
+from src.core.config import settings
+from src.core.models import AppealLetter, DenialExtraction, DenialReason, PatientContext
 from src.integrations.llm import LLMClient
 from src.integrations.ocr import OCRProvider
 from src.templates.appeal_templates import get_required_documents
@@ -13,12 +22,131 @@ from src.templates.appeal_templates import get_required_documents
 logger = structlog.get_logger()
 
 
+def _cache_key(kind: bytes, content: bytes, patient_context: PatientContext | None) -> str:
+    """Content-address a denial plus the patient context it was generated with."""
+    digest = hashlib.blake2b(kind, digest_size=16)
+    digest.update(content)
+    if patient_context is not None:
+        digest.update(b"\0")
+        digest.update(patient_context.model_dump_json(exclude_none=True).encode())
+    return digest.hexdigest()
+
+
+# Weight of each DenialExtraction.to_flag_bits() bit, in bit order
+_CONFIDENCE_WEIGHTS = (1.0, 1.0, 1.5, 1.0, 1.0, 1.0, 0.5, 1.0)
+_CONFIDENCE_MAX_SCORE = 8.0
+
+# Confidence for every possible flag combination, so scoring is one table lookup
+_CONFIDENCE_BY_FLAGS: tuple[float, ...] = tuple(
+    round(
+        sum(w for bit, w in enumerate(_CONFIDENCE_WEIGHTS) if flags >> bit & 1)
+        / _CONFIDENCE_MAX_SCORE,
+        2,
+    )
+    for flags in range(1 << len(_CONFIDENCE_WEIGHTS))
+)
+
+# to_flag_bits() bit for a classified denial_reason, which the keyword fallback can set
+_REASON_FLAG = 1 << 2
+
+
+def _extraction_failed(denial: DenialExtraction) -> bool:
+    """True when the LLM extraction fell back to the bare text (nothing but a reason set)."""
+    return not denial.to_flag_bits() & ~_REASON_FLAG
+
+
+# Keyword phrases per denial reason, used when the LLM cannot classify a denial
+_REASON_PHRASES: tuple[tuple[DenialReason, tuple[str, ...]], ...] = (
+    (
+        DenialReason.MEDICAL_NECESSITY,
+        (r"\bmedical(?:ly)?\s+necess(?:ity|ary)\b",),
+    ),
+    (
+        DenialReason.STEP_THERAPY,
+        (r"\bstep\s+therapy\b", r"\bstep\s+edit\b"),
+    ),
+    (
+        DenialReason.EXPERIMENTAL,
+        (r"\bexperimental\b", r"\binvestigational\b"),
+    ),
+    (
+        DenialReason.OUT_OF_NETWORK,
+        (r"\bout[\s-]of[\s-]network\b", r"\bnon[\s-]?participating\s+provider\b"),
+    ),
+    (
+        DenialReason.NOT_COVERED,
+        (
+            r"\bnot\s+a\s+covered\s+(?:benefit|service)\b",
+            r"\bnon[\s-]?covered\b",
+            r"\bexcluded\s+from\s+(?:your\s+)?coverage\b",
+            r"\bbenefit\s+exclusion\b",
+        ),
+    ),
+    (
+        DenialReason.MISSING_INFO,
+        (
+            r"\b(?:missing|insufficient|incomplete)\s+(?:information|documentation|records)\b",
+            r"\badditional\s+(?:information|documentation)\s+(?:is\s+)?(?:required|needed)\b",
+        ),
+    ),
+    (
+        DenialReason.QUANTITY_LIMIT,
+        (
+            r"\bquantity\s+limits?\b",
+            r"\bexceeds?\s+the\s+(?:maximum|allowed)\s+(?:quantity|dose|units)\b",
+        ),
+    ),
+    (
+        DenialReason.PRIOR_AUTH_REQUIRED,
+        (
+            r"\b(?:no|without)\s+prior\s+authori[sz]ation\b",
+            r"\bprior\s+authori[sz]ation\s+(?:was\s+)?not\s+(?:obtained|requested)\b",
+        ),
+    ),
+)
+
+# All phrases in one alternation, one named group per reason, so classification
+# is a single pass over the text however many phrases there are
+_REASON_PATTERN = re.compile(
+    "|".join(f"(?P<{reason.name}>{'|'.join(phrases)})" for reason, phrases in _REASON_PHRASES),
+    re.IGNORECASE,
+)
+
+
+def _classify_denial_reason(text: str) -> DenialReason:
+    """Classify a denial by keyword counts; OTHER if no keyword matches."""
+    # Every alternative is a named group, so lastgroup is only None in the type
+    counts = Counter(
+        name for match in _REASON_PATTERN.finditer(text) if (name := match.lastgroup) is not None
+    )
+    if not counts:
+        return DenialReason.OTHER
+    return DenialReason[counts.most_common(1)[0][0]]
+
+
+def _with_fallback_reason(denial: DenialExtraction, reason: DenialReason) -> DenialExtraction:
+    """Use the keyword classification only where the LLM extraction gave OTHER."""
+    if denial.denial_reason is DenialReason.OTHER and reason is not DenialReason.OTHER:
+        return denial.model_copy(update={"denial_reason": reason})
+    return denial
+
+
+def _uuid_batch(n: int) -> list[str]:
+    """Generate n random (version 4) UUID strings from a single urandom read."""
+    buf = os.urandom(16 * n)
+    return [str(uuid.UUID(bytes=buf[i : i + 16], version=4)) for i in range(0, 16 * n, 16)]
+
+
 class AppealGenerationService:
     """Orchestrates the denial → extraction → appeal pipeline."""
 
     def __init__(self, ocr_provider: OCRProvider, llm_client: LLMClient) -> None:
         self.ocr = ocr_provider
         self.llm = llm_client
+        self._appeal_cache: TTLCache[str, AppealLetter] = TTLCache(
+            maxsize=settings.appeal_cache_size,
+            ttl=settings.appeal_cache_ttl_seconds,
+        )
 
     async def process_denial(
         self,
@@ -32,41 +160,107 @@ class AppealGenerationService:
         1. OCR: Extract text from denial document
         2. Extract: Parse denial reason, codes, deadlines
         3. Generate: Create appeal letter with medical necessity justification
+
+        Steps 2 and 3 share a single LLM call.
         """
         log = logger.bind(has_patient_context=patient_context is not None)
 
+        cache_key = _cache_key(b"document:", document_bytes, patient_context)
+        cached = self._from_cache(cache_key)
+        if cached is not None:
+            log.info("Appeal served from cache", appeal_id=cached.id)
+            return cached
+
         # Step 1: OCR extraction
         log.info("Starting OCR extraction")
         denial_text = await self.ocr.extract_text(document_bytes)
         log.info("OCR complete", text_length=len(denial_text))
 
-        # Step 2: Structured extraction
-        log.info("Extracting denial information")
-        denial_info = await self.llm.extract_denial_info(denial_text)
+        # Steps 2-3: Structured extraction and appeal generation, in one LLM call
+        log.info("Extracting denial information and generating appeal letter")
+        denial_info, appeal_content = await self._extract_and_appeal(denial_text, patient_context)
         log.info(
             "Denial extracted",
             payer=denial_info.payer_name,
             reason=denial_info.denial_reason.value,
         )
 
-        # Step 3: Generate appeal
-        log.info("Generating appeal letter")
-        appeal_content = await self.llm.generate_appeal(denial_info, patient_context)
+        appeal = self._build_appeal(denial_info, appeal_content)
 
-        # Determine required attachments based on denial reason
-        required_docs = self._get_required_documents(denial_info)
+        self._cache_appeal(cache_key, appeal)
+        log.info("Appeal generated", appeal_id=appeal.id)
+        return appeal
 
-        appeal = AppealLetter(
-            id=str(uuid.uuid4()),
-            denial_extraction=denial_info,
-            letter_content=appeal_content,
-            required_attachments=required_docs,
-            generated_at=datetime.utcnow(),
-            confidence_score=self._calculate_confidence(denial_info),
+    async def process_denials(
+        self,
+        documents: Sequence[bytes],
+        mode: Literal["sync", "batch"] = "sync",
+    ) -> list[AppealLetter]:
+        """
+        Process a queue of denial documents, batching the extraction step.
+
+        OCR and appeal generation run concurrently (bounded) per document; extraction
+        goes through the LLM in batches. With mode="batch", appeal letters go
+        through the Message Batches API instead (half price, but may take up
+        to hours), for backfills and other work nobody is waiting on.
+        Results are in input order.
+        """
+        keys = [_cache_key(b"document:", document, None) for document in documents]
+        appeals: dict[int, AppealLetter] = {}
+        for i, key in enumerate(keys):
+            if (cached := self._from_cache(key)) is not None:
+                appeals[i] = cached
+        pending = [i for i in range(len(documents)) if i not in appeals]
+        log = logger.bind(documents=len(documents), uncached=len(pending))
+        if not pending:
+            return [appeals[i] for i in range(len(documents))]
+
+        log.info("Starting OCR extraction")
+        texts = await self.ocr.extract_text_batch([documents[i] for i in pending])
+
+        log.info("Extracting denial information")
+        denials, fast_reasons = await asyncio.gather(
+            self.llm.extract_denials_batch(list(texts)),
+            asyncio.to_thread(lambda: [_classify_denial_reason(text) for text in texts]),
         )
+        denials = [
+            _with_fallback_reason(denial, reason)
+            for denial, reason in zip(denials, fast_reasons, strict=True)
+        ]
 
-        log.info("Appeal generated", appeal_id=appeal.id)
-        return appeal
+        log.info("Generating appeal letters", mode=mode)
+        if mode == "batch":
+            contents = await self._generate_appeals_batched(denials)
+        else:
+            contents = await self.llm.generate_many(denials)
+
+        appeal_ids = _uuid_batch(len(pending))
+        generated_at = datetime.now(UTC)
+        for i, appeal_id, denial_info, appeal_content in zip(
+            pending, appeal_ids, denials, contents, strict=True
+        ):
+            appeal = self._build_appeal(denial_info, appeal_content, appeal_id, generated_at)
+            self._cache_appeal(keys[i], appeal)
+            appeals[i] = appeal
+
+        log.info("Appeals generated")
+        return [appeals[i] for i in range(len(documents))]
+
+    async def _generate_appeals_batched(self, denials: list[DenialExtraction]) -> list[str]:
+        """Generate appeals via the Message Batches API, retrying failures synchronously."""
+        batch_id = await self.llm.submit_appeal_batch(denials)
+        contents = {
+            int(custom_id): text
+            async for custom_id, text in self.llm.poll_batch(batch_id)
+            if text is not None
+        }
+
+        failed = [i for i in range(len(denials)) if i not in contents]
+        if failed:
+            logger.warning("Retrying failed batch appeals", batch_id=batch_id, failed=len(failed))
+            retried = await self.llm.generate_many([denials[i] for i in failed])
+            contents.update(zip(failed, retried, strict=True))
+        return [contents[i] for i in range(len(denials))]
 
     async def process_denial_from_text(
         self,
@@ -80,28 +274,112 @@ class AppealGenerationService:
         """
         log = logger.bind(has_patient_context=patient_context is not None)
 
-        # Step 1: Structured extraction
+        cache_key = _cache_key(b"text:", denial_text.encode(), patient_context)
+        cached = self._from_cache(cache_key)
+        if cached is not None:
+            log.info("Appeal served from cache", appeal_id=cached.id)
+            return cached
+
+        # Structured extraction and appeal generation, in one LLM call
+        log.info("Extracting denial information and generating appeal letter")
+        denial_info, appeal_content = await self._extract_and_appeal(denial_text, patient_context)
+
+        appeal = self._build_appeal(denial_info, appeal_content)
+
+        self._cache_appeal(cache_key, appeal)
+        return appeal
+
+    async def stream_denial_from_text(
+        self,
+        denial_text: str,
+        patient_context: PatientContext | None = None,
+    ) -> AsyncIterator[AppealLetter | str]:
+        """
+        Process a denial from text, streaming the letter as it is generated.
+
+        Yields the appeal metadata first (with empty ``letter_content``),
+        followed by chunks of letter text. The completed appeal is cached
+        exactly as process_denial_from_text would cache it.
+        """
+        log = logger.bind(has_patient_context=patient_context is not None)
+
+        cache_key = _cache_key(b"text:", denial_text.encode(), patient_context)
+        cached = self._from_cache(cache_key)
+        if cached is not None:
+            log.info("Appeal served from cache", appeal_id=cached.id)
+            yield cached.model_copy(update={"letter_content": ""})
+            yield cached.letter_content
+            return
+
         log.info("Extracting denial information from text")
-        denial_info = await self.llm.extract_denial_info(denial_text)
+        denial_info = await self._extract_denial_info(denial_text)
 
-        # Step 2: Generate appeal
-        log.info("Generating appeal letter")
-        appeal_content = await self.llm.generate_appeal(denial_info, patient_context)
+        appeal = self._build_appeal(denial_info, "")
+        yield appeal
 
-        required_docs = self._get_required_documents(denial_info)
+        log.info("Streaming appeal letter")
+        chunks: list[str] = []
+        async for chunk in self.llm.stream_appeal(denial_info, patient_context):
+            chunks.append(chunk)
+            yield chunk
 
-        appeal = AppealLetter(
-            id=str(uuid.uuid4()),
+        self._cache_appeal(cache_key, appeal.model_copy(update={"letter_content": "".join(chunks)}))
+        log.info("Appeal streamed", appeal_id=appeal.id)
+
+    async def _extract_denial_info(self, denial_text: str) -> DenialExtraction:
+        """Run LLM extraction alongside the local keyword classifier."""
+        denial_info, fast_reason = await asyncio.gather(
+            self.llm.extract_denial_info(denial_text),
+            asyncio.to_thread(_classify_denial_reason, denial_text),
+        )
+        return _with_fallback_reason(denial_info, fast_reason)
+
+    async def _extract_and_appeal(
+        self,
+        denial_text: str,
+        patient_context: PatientContext | None,
+    ) -> tuple[DenialExtraction, str]:
+        """Run the combined LLM extraction/appeal call alongside the keyword classifier."""
+        (denial_info, appeal_content), fast_reason = await asyncio.gather(
+            self.llm.extract_and_appeal(denial_text, patient_context),
+            asyncio.to_thread(_classify_denial_reason, denial_text),
+        )
+        return _with_fallback_reason(denial_info, fast_reason), appeal_content
+
+    def _cache_appeal(self, cache_key: str, appeal: AppealLetter) -> None:
+        """Cache an appeal unless its extraction failed, so a retry reaches the LLM again."""
+        if _extraction_failed(appeal.denial_extraction):
+            logger.warning("Extraction failed; appeal not cached", appeal_id=appeal.id)
+            return
+        self._appeal_cache[cache_key] = appeal
+
+    def _from_cache(self, cache_key: str) -> AppealLetter | None:
+        """Return a fresh copy of a cached appeal, if one exists."""
+        cached = self._appeal_cache.get(cache_key)
+        if cached is None:
+            return None
+        return cached.model_copy(
+            update={"id": str(uuid.uuid4()), "generated_at": datetime.now(UTC)}
+        )
+
+    def _build_appeal(
+        self,
+        denial_info: DenialExtraction,
+        appeal_content: str,
+        appeal_id: str | None = None,
+        generated_at: datetime | None = None,
+    ) -> AppealLetter:
+        """Assemble an appeal with its required attachments and confidence score."""
+        return AppealLetter(
+            id=appeal_id or str(uuid.uuid4()),
             denial_extraction=denial_info,
             letter_content=appeal_content,
-            required_attachments=required_docs,
-            generated_at=datetime.utcnow(),
+            required_attachments=self._get_required_documents(denial_info),
+            generated_at=generated_at or datetime.now(UTC),
             confidence_score=self._calculate_confidence(denial_info),
         )
 
-        return appeal
-
-    def _get_required_documents(self, denial: DenialExtraction) -> list[str]:
+    def _get_required_documents(self, denial: DenialExtraction) -> tuple[str, ...]:
         """Determine required supporting documents based on denial reason."""
         return get_required_documents(denial.denial_reason.value)
 
@@ -111,24 +389,4 @@ class AppealGenerationService:
 
         Higher scores indicate more complete information extraction.
         """
-        score = 0.0
-        max_score = 8.0
-
-        if denial.payer_name:
-            score += 1.0
-        if denial.denial_date:
-            score += 1.0
-        if denial.denial_reason.value != "other":
-            score += 1.5
-        if denial.denial_reason_text:
-            score += 1.0
-        if denial.procedure_codes:
-            score += 1.0
-        if denial.diagnosis_codes:
-            score += 1.0
-        if denial.claim_number:
-            score += 0.5
-        if denial.appeal_deadline:
-            score += 1.0
-
-        return round(score / max_score, 2)
+        return _CONFIDENCE_BY_FLAGS[denial.to_flag_bits()]
@@ -1,27 +1,29 @@
 """LLM integration for appeal generation."""
 
-import json
-import re
-from datetime import datetime
-
-import anthropic
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator, Awaitable, Iterable, Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, TypeVar
+
+import orjson
 import structlog
+from cachetools import LRUCache
 
 from src.core.config import settings
-from src.core.models import DenialExtraction, DenialReason, PatientContext
-
-logger = structlog.get_logger()
+from src.core.models import DenialExtraction, PatientContext
+from src.templates.appeal_templates import CompiledTemplate, compile_template, render_compiled
 
-DENIAL_EXTRACTION_PROMPT = """You are a healthcare prior authorization specialist analyzing denial letters.
+if TYPE_CHECKING:
+    import anthropic
+    from anthropic.types import Message, TextBlockParam
 
-Extract the following information from this denial letter and return ONLY valid JSON (no markdown, no explanation):
+logger = structlog.get_logger()
 
-<denial_letter>
-{denial_text}
-</denial_letter>
+T = TypeVar("T")
 
-Return this exact JSON structure:
-{{
+_EXTRACTION_FIELDS = """{
     "payer_name": "string or null",
     "denial_date": "YYYY-MM-DD or null",
     "denial_reason": "one of: medical_necessity, not_covered, out_of_network, missing_information, experimental_treatment, step_therapy_required, quantity_limit, prior_auth_required, other",
@@ -31,26 +33,75 @@ Return this exact JSON structure:
     "member_id": "string or null",
     "claim_number": "string or null",
     "appeal_deadline": "YYYY-MM-DD or null"
-}}
+}"""
 
-Important:
+_EXTRACTION_RULES = """Important:
 - Extract exact values from the letter, don't infer
 - Use null for missing information
 - denial_reason must be one of the specified values
 - Dates should be YYYY-MM-DD format"""
 
-APPEAL_TEMPLATES = {
-    "medical_necessity": """
-RE: Appeal for Denial of Prior Authorization - Medical Necessity
-Member: {patient_name}
+# Static instructions go in the system prompt so the API can cache them;
+# only the denial letter itself varies per request.
+DENIAL_EXTRACTION_SYSTEM_PROMPT = f"""You are a healthcare prior authorization specialist analyzing denial letters.
+
+Extract the following information from the denial letter in the user's message and return ONLY valid JSON (no markdown, no explanation).
+
+Return this exact JSON structure:
+{_EXTRACTION_FIELDS}
+
+{_EXTRACTION_RULES}"""
+
+DENIAL_BATCH_EXTRACTION_SYSTEM_PROMPT = f"""You are a healthcare prior authorization specialist analyzing denial letters.
+
+Extract the following information from each denial letter in the user's message and return ONLY a valid JSON array (no markdown, no explanation).
+
+Return a JSON array with exactly one object per letter, in the order given, each with this exact structure:
+{_EXTRACTION_FIELDS}
+
+{_EXTRACTION_RULES}"""
+
+# Letters per batched extraction call, keeping the JSON array within the output budget
+EXTRACTION_BATCH_SIZE = 10
+
+# Fragments shared by every appeal template
+_TEMPLATE_MEMBER_LINES = """Member: {patient_name}
 Member ID: {member_id}
 Claim Number: {claim_number}
-Date of Service: {service_date}
-Procedure: {procedure_code} - {procedure_description}
+"""
+_TEMPLATE_SERVICE_DATE_LINE = "Date of Service: {service_date}\n"
+_TEMPLATE_GREETING = """Procedure: {procedure_code} - {procedure_description}
 
 Dear {payer_name} Appeals Department,
 
-I am writing to formally appeal the denial of prior authorization for {procedure_description} for the above-referenced patient. The denial letter dated {denial_date} states the procedure was denied due to lack of medical necessity. We respectfully disagree with this determination and request an expedited review.
+"""
+_TEMPLATE_SIGNATURE = """Sincerely,
+
+[Treating Physician Name, MD]
+"""
+
+
+def _compose_template(
+    subject: str, body: str, signature_extra: str = "", *, service_date: bool = True
+) -> str:
+    """Assemble an appeal template from the shared header and signature fragments."""
+    return "".join(
+        (
+            f"\nRE: {subject}\n",
+            _TEMPLATE_MEMBER_LINES,
+            _TEMPLATE_SERVICE_DATE_LINE if service_date else "",
+            _TEMPLATE_GREETING,
+            body,
+            _TEMPLATE_SIGNATURE,
+            signature_extra,
+        )
+    )
+
+
+APPEAL_TEMPLATES = {
+    "medical_necessity": _compose_template(
+        "Appeal for Denial of Prior Authorization - Medical Necessity",
+        """I am writing to formally appeal the denial of prior authorization for {procedure_description} for the above-referenced patient. The denial letter dated {denial_date} states the procedure was denied due to lack of medical necessity. We respectfully disagree with this determination and request an expedited review.
 
 CLINICAL JUSTIFICATION:
 
@@ -76,23 +127,12 @@ We request that {payer_name} reverse the denial and authorize {procedure_descrip
 
 Please contact our office if additional clinical documentation is required.
 
-Sincerely,
-
-[Treating Physician Name, MD]
-[Practice Name]
-[Phone Number]
-[Fax Number]
 """,
-    "step_therapy_required": """
-RE: Appeal for Denial - Step Therapy Override Request
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure: {procedure_code} - {procedure_description}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to appeal the denial requiring step therapy for {procedure_description}. We request an exception to the step therapy requirement based on the following clinical justification.
+        "[Practice Name]\n[Phone Number]\n[Fax Number]\n",
+    ),
+    "step_therapy_required": _compose_template(
+        "Appeal for Denial - Step Therapy Override Request",
+        """I am writing to appeal the denial requiring step therapy for {procedure_description}. We request an exception to the step therapy requirement based on the following clinical justification.
 
 PRIOR TREATMENTS ATTEMPTED:
 {prior_treatments}
@@ -107,21 +147,12 @@ Based on the patient's treatment history and clinical presentation, continuing t
 
 We request approval for {procedure_description} as the appropriate next step in this patient's care.
 
-Sincerely,
-
-[Treating Physician Name, MD]
 """,
-    "default": """
-RE: Appeal for Prior Authorization Denial
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Date of Service: {service_date}
-Procedure: {procedure_code} - {procedure_description}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to formally appeal the denial of prior authorization referenced above. The denial dated {denial_date} cited the following reason:
+        service_date=False,
+    ),
+    "default": _compose_template(
+        "Appeal for Prior Authorization Denial",
+        """I am writing to formally appeal the denial of prior authorization referenced above. The denial dated {denial_date} cited the following reason:
 
 "{denial_reason_text}"
 
@@ -140,15 +171,17 @@ The requested treatment is appropriate for this patient based on their clinical
 
 We request a timely review of this appeal and authorization of the requested service.
 
-Sincerely,
-
-[Treating Physician Name, MD]
-[Practice Name]
-[Contact Information]
-"""
+""",
+        "[Practice Name]\n[Contact Information]\n",
+    ),
 }
 
-APPEAL_ENHANCEMENT_PROMPT = """You are a healthcare appeals specialist. Enhance the following appeal letter draft by:
+# Templates pre-parsed into (literal, field) pairs so drafts are filled without re-parsing
+_COMPILED_TEMPLATES: Mapping[str, CompiledTemplate] = MappingProxyType(
+    {key: compile_template(template) for key, template in APPEAL_TEMPLATES.items()}
+)
+
+APPEAL_ENHANCEMENT_SYSTEM_PROMPT = """You are a healthcare appeals specialist. Enhance the appeal letter draft in the user's message by:
 
 1. Making it more persuasive while maintaining professionalism
 2. Adding specific clinical language appropriate for the diagnosis
@@ -156,7 +189,9 @@ APPEAL_ENHANCEMENT_PROMPT = """You are a healthcare appeals specialist. Enhance
 4. Adding relevant clinical guidelines or standards of care references where appropriate
 5. Improving flow and readability
 
-Original draft:
+Return the enhanced appeal letter. Maintain the formal letter format."""
+
+APPEAL_ENHANCEMENT_PROMPT = """Original draft:
 {draft}
 
 Denial context:
@@ -166,83 +201,272 @@ Denial context:
 - Diagnoses: {diagnosis_codes}
 
 Patient context:
-{patient_context}
+{patient_context}"""
 
-Return the enhanced appeal letter. Maintain the formal letter format."""
+_INDENTED_EXTRACTION_FIELDS = _EXTRACTION_FIELDS.replace("\n", "\n    ")
+
+EXTRACT_AND_APPEAL_SYSTEM_PROMPT = f"""You are a healthcare prior authorization and appeals specialist.
+
+For the denial letter in the user's message, do both of the following in one response:
+
+1. Extract the denial details from the letter.
+2. Write an appeal letter for the denial that:
+   - Is persuasive while maintaining professionalism
+   - Uses specific clinical language appropriate for the diagnosis
+   - Fills placeholders from the letter and patient context, or marks them [TO BE COMPLETED]
+   - References relevant clinical guidelines or standards of care where appropriate
+   - Follows the formal letter format of this example:
+
+<example_letter>
+{APPEAL_TEMPLATES["default"].strip()}
+</example_letter>
+
+Return ONLY valid JSON (no markdown, no explanation) with this exact structure:
+{{
+    "extraction": {_INDENTED_EXTRACTION_FIELDS},
+    "appeal_letter": "the complete appeal letter text"
+}}
+
+{_EXTRACTION_RULES}"""
+
+
+def _cached_system(prompt: str) -> list["TextBlockParam"]:
+    """Wrap a static system prompt in a block marked for Anthropic prompt caching."""
+    return [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+_EXTRACTION_SYSTEM = _cached_system(DENIAL_EXTRACTION_SYSTEM_PROMPT)
+_BATCH_EXTRACTION_SYSTEM = _cached_system(DENIAL_BATCH_EXTRACTION_SYSTEM_PROMPT)
+_APPEAL_SYSTEM = _cached_system(APPEAL_ENHANCEMENT_SYSTEM_PROMPT)
+_EXTRACT_AND_APPEAL_SYSTEM = _cached_system(EXTRACT_AND_APPEAL_SYSTEM_PROMPT)
+
+
+class _JSONSpanScanner:
+    """Track bracket depth over streamed text to spot the end of the first JSON value."""
+
+    def __init__(self, open_char: str = "{", close_char: str = "}") -> None:
+        self.open_char = open_char
+        self.close_char = close_char
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, chunk: str) -> int:
+        """Consume a chunk; return the index just past the closing bracket, or -1."""
+        for i, char in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.depth > 0
+            elif char == self.open_char:
+                self.depth += 1
+            elif char == self.close_char and self.depth:
+                self.depth -= 1
+                if not self.depth:
+                    return i + 1
+        return -1
+
+
+def _extract_json_span(text: str, open_char: str = "{", close_char: str = "}") -> str | None:
+    """Return the first balanced JSON object (or array) in text, in one linear pass."""
+    start = text.find(open_char)
+    if start < 0:
+        return None
+    end = _JSONSpanScanner(open_char, close_char).feed(text[start:])
+    return text[start : start + end] if end >= 0 else None
+
+
+def _parse_json_reply(text: str, open_char: str = "{", close_char: str = "}") -> Any:
+    """Parse the JSON value in an LLM reply, tolerating markdown fences and prose."""
+    stripped = text.strip()
+    if stripped.startswith(open_char):
+        try:
+            return orjson.loads(stripped)
+        except orjson.JSONDecodeError:
+            pass
+    span = _extract_json_span(text, open_char, close_char)
+    return orjson.loads(span if span is not None else text)
+
+
+def _reply_text(message: "Message") -> str:
+    """Text of a reply's first content block; these calls only ever get text back."""
+    block = message.content[0]
+    if block.type != "text":
+        raise ValueError(f"Expected a text reply from the LLM, got a {block.type} block")
+    return block.text
+
+
+def _extraction_from_data(data: dict[str, Any], denial_text: str) -> DenialExtraction:
+    """Build a DenialExtraction from the LLM's parsed JSON object."""
+    # The model's validators coerce unknown reasons to OTHER and drop unparseable dates
+    return DenialExtraction.model_validate({**data, "raw_text": denial_text})
+
+
+_EMPTY_PATIENT_CONTEXT = "No additional patient context provided."
+
+
+def _patient_context_str(patient_context: PatientContext | None) -> str:
+    """Describe the patient context for an LLM prompt."""
+    if not patient_context:
+        return _EMPTY_PATIENT_CONTEXT
+    prior_treatments = patient_context.prior_treatments
+    return "\n".join(
+        (
+            "",
+            f"Patient: {patient_context.patient_name}",
+            f"DOB: {patient_context.date_of_birth or 'Not provided'}",
+            f"Procedure: {patient_context.procedure_code} - {patient_context.procedure_description or 'Not specified'}",
+            f"Treating Physician: {patient_context.treating_physician or 'Not specified'}",
+            f"Prior Treatments: {', '.join(prior_treatments) if prior_treatments else 'None documented'}",
+            f"Clinical Notes: {patient_context.clinical_notes or 'None provided'}",
+            "",
+        )
+    )
+
+
+def _build_appeal_prompt(
+    denial: DenialExtraction,
+    patient_context: PatientContext | None,
+) -> str:
+    """Fill the appeal template and wrap it in the enhancement prompt."""
+    # Select template based on denial reason
+    template_key = denial.denial_reason.value
+    if template_key not in APPEAL_TEMPLATES:
+        template_key = "default"
+
+    # Joined once and shared by the draft and the enhancement prompt
+    procedure_codes = ", ".join(denial.procedure_codes)
+    diagnosis_codes = ", ".join(denial.diagnosis_codes)
+
+    # Patient context fields, None when there is no context
+    pc = patient_context
+    ctx_member_id = pc.member_id if pc else None
+    ctx_procedure_description = pc.procedure_description if pc else None
+    ctx_clinical_notes = pc.clinical_notes if pc else None
+    ctx_prior_treatments = pc.prior_treatments if pc else None
+
+    denial_date = denial.denial_date.strftime("%B %d, %Y") if denial.denial_date else None
+    prior_treatments = (
+        "\n".join(f"- {t}" for t in ctx_prior_treatments) if ctx_prior_treatments else None
+    )
+
+    # Prepare template variables
+    fields = {
+        "patient_name": pc.patient_name if pc else "[PATIENT NAME]",
+        "member_id": denial.member_id or ctx_member_id or "[MEMBER ID]",
+        "claim_number": denial.claim_number or "[CLAIM NUMBER]",
+        "service_date": "[DATE OF SERVICE]",
+        "procedure_code": procedure_codes or "[PROCEDURE CODE]",
+        "procedure_description": ctx_procedure_description or "[PROCEDURE DESCRIPTION]",
+        "payer_name": denial.payer_name or "[INSURANCE COMPANY]",
+        "denial_date": denial_date or "[DENIAL DATE]",
+        "diagnosis_codes": diagnosis_codes or "[DIAGNOSIS CODES]",
+        "clinical_notes": ctx_clinical_notes or "[CLINICAL NOTES TO BE ADDED]",
+        "prior_treatments": prior_treatments or "[PRIOR TREATMENTS TO BE ADDED]",
+        "denial_reason_text": denial.denial_reason_text or "[DENIAL REASON]",
+    }
+    draft = render_compiled(_COMPILED_TEMPLATES[template_key], fields)
+
+    return APPEAL_ENHANCEMENT_PROMPT.format(
+        draft=draft,
+        payer_name=denial.payer_name or "Unknown",
+        denial_reason=denial.denial_reason.value,
+        procedure_codes=procedure_codes or "Not specified",
+        diagnosis_codes=diagnosis_codes or "Not specified",
+        patient_context=_patient_context_str(patient_context),
+    )
+
+
+async def _gather_bounded(coros: Iterable[Awaitable[T]], concurrency: int) -> list[T]:
+    """Gather awaitables in order, running at most `concurrency` at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(coro: Awaitable[T]) -> T:
+        async with semaphore:
+            return await coro
+
+    return list(await asyncio.gather(*(bounded(coro) for coro in coros)))
+
+
+@lru_cache(maxsize=1)
+def _shared_async_client() -> "anthropic.AsyncAnthropic":
+    """Process-wide Anthropic client, so every LLMClient reuses one connection pool."""
+    # The SDK takes most of the app's import time; defer it until a client is needed
+    import anthropic
+    import httpx2
+
+    return anthropic.AsyncAnthropic(
+        api_key=settings.anthropic_api_key,
+        # The SDK's HTTP client is httpx2, so its pool settings are httpx2 types
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            limits=httpx2.Limits(max_connections=100, max_keepalive_connections=50),
+            # HTTP/2 multiplexes concurrent calls over one connection
+            http2=True,
+            timeout=60.0,
+        ),
+    )
 
 
 class LLMClient:
     """Client for LLM-based text generation."""
 
     def __init__(self) -> None:
-        self.client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+        self.client = _shared_async_client()
+        # Extractions by denial text digest; the same letter often comes back
+        # with different patient context, which misses the service's appeal cache
+        self._extraction_cache: LRUCache[str, DenialExtraction] = LRUCache(
+            maxsize=settings.extraction_cache_size
+        )
 
     async def extract_denial_info(self, denial_text: str) -> DenialExtraction:
         """Extract structured information from denial letter text."""
         log = logger.bind(text_length=len(denial_text))
+
+        cache_key = hashlib.blake2b(denial_text.encode(), digest_size=16).hexdigest()
+        cached = self._extraction_cache.get(cache_key)
+        if cached is not None:
+            log.info("Extraction served from cache")
+            return cached.model_copy(deep=True)
+
         log.info("Sending extraction request to LLM")
 
-        message = self.client.messages.create(
+        # Stream the reply and stop reading once the JSON object closes,
+        # overlapping the network tail with parsing
+        chunks: list[str] = []
+        scanner = _JSONSpanScanner()
+        async with self.client.messages.stream(
             model="claude-sonnet-4-20250514",
             max_tokens=1024,
+            system=_EXTRACTION_SYSTEM,
             messages=[
-                {
-                    "role": "user",
-                    "content": DENIAL_EXTRACTION_PROMPT.format(denial_text=denial_text),
-                }
+                {"role": "user", "content": f"<denial_letter>\n{denial_text}\n</denial_letter>"}
             ],
-        )
-
-        response_text = message.content[0].text
+        ) as stream:
+            async for text in stream.text_stream:
+                end = scanner.feed(text)
+                if end >= 0:
+                    chunks.append(text[:end])
+                    break
+                chunks.append(text)
+
+        response_text = "".join(chunks)
         log.debug("LLM response received", response_length=len(response_text))
 
         # Parse JSON from response
         try:
-            # Try to extract JSON from response (handle potential markdown wrapping)
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                data = json.loads(json_match.group())
-            else:
-                data = json.loads(response_text)
-        except json.JSONDecodeError as e:
+            data = _parse_json_reply(response_text)
+        except orjson.JSONDecodeError as e:
             log.error("Failed to parse LLM response as JSON", error=str(e))
             # Return minimal extraction with raw text
             return DenialExtraction(raw_text=denial_text)
 
-        # Map denial reason string to enum
-        reason_str = data.get("denial_reason", "other")
-        try:
-            denial_reason = DenialReason(reason_str)
-        except ValueError:
-            denial_reason = DenialReason.OTHER
-
-        # Parse dates
-        denial_date = None
-        if data.get("denial_date"):
-            try:
-                denial_date = datetime.strptime(data["denial_date"], "%Y-%m-%d")
-            except ValueError:
-                pass
-
-        appeal_deadline = None
-        if data.get("appeal_deadline"):
-            try:
-                appeal_deadline = datetime.strptime(data["appeal_deadline"], "%Y-%m-%d")
-            except ValueError:
-                pass
-
-        extraction = DenialExtraction(
-            payer_name=data.get("payer_name"),
-            denial_date=denial_date,
-            denial_reason=denial_reason,
-            denial_reason_text=data.get("denial_reason_text"),
-            procedure_codes=data.get("procedure_codes", []),
-            diagnosis_codes=data.get("diagnosis_codes", []),
-            member_id=data.get("member_id"),
-            claim_number=data.get("claim_number"),
-            appeal_deadline=appeal_deadline,
-            raw_text=denial_text,
-        )
+        extraction = _extraction_from_data(data, denial_text)
+        self._extraction_cache[cache_key] = extraction
 
         log.info(
             "Extraction complete",
@@ -251,6 +475,152 @@ class LLMClient:
         )
         return extraction
 
+    async def extract_denials_batch(self, denial_texts: list[str]) -> list[DenialExtraction]:
+        """
+        Extract several denial letters with one LLM call per EXTRACTION_BATCH_SIZE letters.
+
+        Falls back to per-letter extraction for a batch whose response is not a
+        JSON array with one object per letter.
+        """
+        batches = [
+            denial_texts[i : i + EXTRACTION_BATCH_SIZE]
+            for i in range(0, len(denial_texts), EXTRACTION_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(self._extract_batch(batch) for batch in batches))
+        return [extraction for batch in results for extraction in batch]
+
+    async def _extract_batch(self, denial_texts: list[str]) -> list[DenialExtraction]:
+        """Extract one bounded batch of denial letters in a single request."""
+        log = logger.bind(batch_size=len(denial_texts))
+        log.info("Sending batched extraction request to LLM")
+
+        denial_letters = "\n\n".join(
+            f'<denial_letter index="{i}">\n{text}\n</denial_letter>'
+            for i, text in enumerate(denial_texts, start=1)
+        )
+        message = await self.client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=1024 * len(denial_texts),
+            system=_BATCH_EXTRACTION_SYSTEM,
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"{len(denial_texts)} denial letters:\n\n{denial_letters}",
+                }
+            ],
+        )
+
+        response_text = _reply_text(message)
+        try:
+            items = _parse_json_reply(response_text, "[", "]")
+        except orjson.JSONDecodeError as e:
+            log.error("Failed to parse batched LLM response as JSON", error=str(e))
+            items = None
+
+        if (
+            not isinstance(items, list)
+            or len(items) != len(denial_texts)
+            or not all(isinstance(item, dict) for item in items)
+        ):
+            log.warning("Batched extraction unusable, extracting letters individually")
+            return await self.extract_many(denial_texts)
+
+        log.info("Batched extraction complete")
+        return [
+            _extraction_from_data(item, text)
+            for item, text in zip(items, denial_texts, strict=True)
+        ]
+
+    async def extract_and_appeal(
+        self,
+        denial_text: str,
+        patient_context: PatientContext | None = None,
+    ) -> tuple[DenialExtraction, str]:
+        """
+        Extract denial information and write the appeal letter in one LLM call.
+
+        Falls back to separate extract_denial_info and generate_appeal calls if
+        the extraction is already cached or the combined response is unusable.
+        """
+        log = logger.bind(
+            text_length=len(denial_text),
+            has_context=patient_context is not None,
+        )
+
+        cache_key = hashlib.blake2b(denial_text.encode(), digest_size=16).hexdigest()
+        if cache_key not in self._extraction_cache:
+            log.info("Sending combined extraction and appeal request to LLM")
+            message = await self.client.messages.create(
+                model="claude-sonnet-4-20250514",
+                max_tokens=3500,
+                system=_EXTRACT_AND_APPEAL_SYSTEM,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": (
+                            f"<denial_letter>\n{denial_text}\n</denial_letter>\n\n"
+                            f"Patient context:\n{_patient_context_str(patient_context)}"
+                        ),
+                    },
+                    # Prefill so the reply starts as the JSON object
+                    {"role": "assistant", "content": "{"},
+                ],
+            )
+
+            response_text = "{" + _reply_text(message)
+            try:
+                data = _parse_json_reply(response_text)
+            except orjson.JSONDecodeError as e:
+                log.error("Failed to parse combined LLM response as JSON", error=str(e))
+                data = None
+
+            if (
+                isinstance(data, dict)
+                and isinstance(data.get("extraction"), dict)
+                and isinstance(data.get("appeal_letter"), str)
+                and data["appeal_letter"].strip()
+            ):
+                extraction = _extraction_from_data(data["extraction"], denial_text)
+                self._extraction_cache[cache_key] = extraction
+                log.info(
+                    "Combined extraction and appeal complete",
+                    payer=extraction.payer_name,
+                    reason=extraction.denial_reason.value,
+                )
+                return extraction, data["appeal_letter"]
+
+            log.warning("Combined response unusable, falling back to separate calls")
+
+        extraction = await self.extract_denial_info(denial_text)
+        return extraction, await self.generate_appeal(extraction, patient_context)
+
+    async def extract_many(
+        self,
+        denial_texts: list[str],
+        concurrency: int | None = None,
+    ) -> list[DenialExtraction]:
+        """Run extract_denial_info over many letters, at most `concurrency` at a time."""
+        return await _gather_bounded(
+            (self.extract_denial_info(text) for text in denial_texts),
+            concurrency or settings.llm_max_concurrency,
+        )
+
+    async def generate_many(
+        self,
+        denials: list[DenialExtraction],
+        patient_contexts: list[PatientContext | None] | None = None,
+        concurrency: int | None = None,
+    ) -> list[str]:
+        """Run generate_appeal over many denials, at most `concurrency` at a time."""
+        contexts = patient_contexts or [None] * len(denials)
+        return await _gather_bounded(
+            (
+                self.generate_appeal(denial, context)
+                for denial, context in zip(denials, contexts, strict=True)
+            ),
+            concurrency or settings.llm_max_concurrency,
+        )
+
     async def generate_appeal(
         self,
         denial: DenialExtraction,
@@ -261,66 +631,110 @@ class LLMClient:
             denial_reason=denial.denial_reason.value,
             has_context=patient_context is not None,
         )
+        log.info("Enhancing appeal draft with LLM")
 
-        # Select template based on denial reason
-        template_key = denial.denial_reason.value
-        if template_key not in APPEAL_TEMPLATES:
-            template_key = "default"
-
-        template = APPEAL_TEMPLATES[template_key]
-
-        # Prepare template variables
-        draft = template.format(
-            patient_name=patient_context.patient_name if patient_context else "[PATIENT NAME]",
-            member_id=denial.member_id or patient_context.member_id if patient_context else "[MEMBER ID]",
-            claim_number=denial.claim_number or "[CLAIM NUMBER]",
-            service_date="[DATE OF SERVICE]",
-            procedure_code=", ".join(denial.procedure_codes) if denial.procedure_codes else "[PROCEDURE CODE]",
-            procedure_description=patient_context.procedure_description if patient_context else "[PROCEDURE DESCRIPTION]",
-            payer_name=denial.payer_name or "[INSURANCE COMPANY]",
-            denial_date=denial.denial_date.strftime("%B %d, %Y") if denial.denial_date else "[DENIAL DATE]",
-            diagnosis_codes=", ".join(denial.diagnosis_codes) if denial.diagnosis_codes else "[DIAGNOSIS CODES]",
-            clinical_notes=patient_context.clinical_notes if patient_context and patient_context.clinical_notes else "[CLINICAL NOTES TO BE ADDED]",
-            prior_treatments="\n".join(f"- {t}" for t in patient_context.prior_treatments) if patient_context and patient_context.prior_treatments else "[PRIOR TREATMENTS TO BE ADDED]",
-            denial_reason_text=denial.denial_reason_text or "[DENIAL REASON]",
+        message = await self.client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=2500,
+            system=_APPEAL_SYSTEM,
+            messages=[{"role": "user", "content": _build_appeal_prompt(denial, patient_context)}],
         )
 
-        # Build patient context string for enhancement
-        context_str = "No additional patient context provided."
-        if patient_context:
-            context_str = f"""
-Patient: {patient_context.patient_name}
-DOB: {patient_context.date_of_birth or 'Not provided'}
-Procedure: {patient_context.procedure_code} - {patient_context.procedure_description or 'Not specified'}
-Treating Physician: {patient_context.treating_physician or 'Not specified'}
-Prior Treatments: {', '.join(patient_context.prior_treatments) if patient_context.prior_treatments else 'None documented'}
-Clinical Notes: {patient_context.clinical_notes or 'None provided'}
-"""
+        log.info("Appeal generation complete")
+        return _reply_text(message)
 
-        log.info("Enhancing appeal draft with LLM")
+    async def stream_appeal(
+        self,
+        denial: DenialExtraction,
+        patient_context: PatientContext | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream the appeal letter text as the LLM generates it."""
+        log = logger.bind(
+            denial_reason=denial.denial_reason.value,
+            has_context=patient_context is not None,
+        )
+        log.info("Streaming appeal draft enhancement from LLM")
 
-        message = self.client.messages.create(
+        async with self.client.messages.stream(
             model="claude-sonnet-4-20250514",
             max_tokens=2500,
-            messages=[
+            system=_APPEAL_SYSTEM,
+            messages=[{"role": "user", "content": _build_appeal_prompt(denial, patient_context)}],
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+        log.info("Appeal stream complete")
+
+    async def submit_appeal_batch(
+        self,
+        denials: list[DenialExtraction],
+        patient_contexts: list[PatientContext | None] | None = None,
+    ) -> str:
+        """
+        Submit appeal generation for many denials to the Message Batches API.
+
+        Batches are billed at half the token price and finish asynchronously,
+        so this suits work nobody is waiting on. Each request's custom_id is
+        the denial's position in the list. Returns the batch id.
+        """
+        contexts = patient_contexts or [None] * len(denials)
+        batch = await self.client.messages.batches.create(
+            requests=[
                 {
-                    "role": "user",
-                    "content": APPEAL_ENHANCEMENT_PROMPT.format(
-                        draft=draft,
-                        payer_name=denial.payer_name or "Unknown",
-                        denial_reason=denial.denial_reason.value,
-                        procedure_codes=", ".join(denial.procedure_codes) or "Not specified",
-                        diagnosis_codes=", ".join(denial.diagnosis_codes) or "Not specified",
-                        patient_context=context_str,
-                    ),
+                    "custom_id": str(i),
+                    "params": {
+                        "model": "claude-sonnet-4-20250514",
+                        "max_tokens": 2500,
+                        "system": _APPEAL_SYSTEM,
+                        "messages": [
+                            {"role": "user", "content": _build_appeal_prompt(denial, context)}
+                        ],
+                    },
                 }
-            ],
+                for i, (denial, context) in enumerate(zip(denials, contexts, strict=True))
+            ]
         )
+        logger.info("Appeal batch submitted", batch_id=batch.id, requests=len(denials))
+        return batch.id
 
-        log.info("Appeal generation complete")
-        return message.content[0].text
+    async def poll_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """
+        Wait for a message batch to end, then yield (custom_id, text) per request.
+
+        Text is None for requests that errored, expired or were canceled.
+        Results arrive in completion order, not submission order.
+        """
+        log = logger.bind(batch_id=batch_id)
+        while True:
+            batch = await self.client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == "ended":
+                break
+            log.debug("Waiting for appeal batch", counts=batch.request_counts.model_dump())
+            await asyncio.sleep(poll_interval)
+
+        async for entry in await self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                yield entry.custom_id, _reply_text(entry.result.message)
+            else:
+                log.warning(
+                    "Batched appeal request failed",
+                    custom_id=entry.custom_id,
+                    result=entry.result.type,
+                )
+                yield entry.custom_id, None
+
+    async def aclose(self) -> None:
+        """Release the shared HTTP connection pool."""
+        await self.client.close()
+        _shared_async_client.cache_clear()
 
 
+@lru_cache(maxsize=1)
 def get_llm_client() -> LLMClient:
-    """Factory function to get LLM client."""
+    """Factory function to get the shared LLM client."""
     return LLMClient()
@@ -1,83 +1,27 @@
 """OCR integration for document processing."""
 
+import asyncio
+import hashlib
+import re
+import uuid
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from functools import cache, lru_cache
+from typing import Any
 
 import structlog
-from tenacity import retry, stop_after_attempt, wait_exponential
+from cachetools import LRUCache
 
 from src.core.config import settings
 
 logger = structlog.get_logger()
 
+# Page objects in a PDF body; "/Pages" tree nodes are excluded by the word boundary
+_PDF_PAGE_RE = re.compile(rb"/Type\s*/Page\b")
 
-class OCRError(Exception):
-    """Raised when OCR extraction fails."""
-
-    pass
-
-
-class OCRProvider(ABC):
-    """Abstract base class for OCR providers."""
-
-    @abstractmethod
-    async def extract_text(self, document_bytes: bytes) -> str:
-        """Extract text from a document."""
-        pass
-
-
-class AWSTextractProvider(OCRProvider):
-    """AWS Textract OCR provider."""
-
-    def __init__(self) -> None:
-        import boto3
-
-        self.client = boto3.client(
-            "textract",
-            region_name=settings.aws_region,
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-        )
-
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-    )
-    async def extract_text(self, document_bytes: bytes) -> str:
-        """Extract text from a document using AWS Textract."""
-        log = logger.bind(doc_size=len(document_bytes))
-        log.info("Starting Textract extraction")
-
-        try:
-            response = self.client.detect_document_text(
-                Document={"Bytes": document_bytes}
-            )
-        except Exception as e:
-            log.error("Textract extraction failed", error=str(e))
-            raise OCRError(f"Failed to extract text: {str(e)}") from e
-
-        extracted_lines = []
-        for block in response.get("Blocks", []):
-            if block["BlockType"] == "LINE":
-                extracted_lines.append(block["Text"])
-
-        text = "\n".join(extracted_lines)
-        log.info("Extraction complete", line_count=len(extracted_lines))
-
-        if not text.strip():
-            raise OCRError("No text extracted from document")
-
-        return text
-
-
-class MockOCRProvider(OCRProvider):
-    """Mock OCR provider for testing without AWS credentials."""
-
-    async def extract_text(self, document_bytes: bytes) -> str:
-        """Return mock denial letter text for testing."""
-        logger.info("Using mock OCR provider")
 
-        # Return a sample denial letter for testing
-        return """
+# Sample denial letter returned by MockOCRProvider
+_MOCK_DENIAL_TEXT = """
 INSURANCE COMPANY NAME: Blue Cross Blue Shield
 CLAIMS DEPARTMENT
 123 Insurance Way
@@ -127,8 +71,248 @@ Blue Cross Blue Shield
 """
 
 
+class OCRError(Exception):
+    """Raised when OCR extraction fails."""
+
+    pass
+
+
+class OCRProvider(ABC):
+    """Abstract base class for OCR providers."""
+
+    @abstractmethod
+    async def extract_text(self, document_bytes: bytes) -> str:
+        """Extract text from a document."""
+        pass
+
+    async def extract_text_batch(self, documents: Sequence[bytes]) -> list[str]:
+        """Extract text from several documents, in input order."""
+        return list(await asyncio.gather(*(self.extract_text(doc) for doc in documents)))
+
+
+@cache
+def _aws_client(service_name: str) -> Any:
+    """Get the shared (thread-safe) boto3 client for an AWS service."""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        service_name,
+        region_name=settings.aws_region,
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        # Sized for concurrent to_thread calls sharing one connection pool; botocore's
+        # adaptive mode rate-limits client-side on throttling instead of stacking retries
+        config=Config(
+            max_pool_connections=50,
+            retries={"max_attempts": 5, "mode": "adaptive"},
+        ),
+    )
+
+
+def _aws_error_code(error: Exception) -> str | None:
+    """Get the AWS error code from a botocore ClientError, if it is one."""
+    from botocore.exceptions import ClientError
+
+    return error.response["Error"]["Code"] if isinstance(error, ClientError) else None
+
+
+class AWSTextractProvider(OCRProvider):
+    """AWS Textract OCR provider."""
+
+    def __init__(self) -> None:
+        self.client = _aws_client("textract")
+        self.s3 = _aws_client("s3") if settings.textract_s3_bucket else None
+        # OCR text by document digest; re-uploads and reprocessing skip Textract
+        self._text_cache: LRUCache[str, str] = LRUCache(maxsize=settings.ocr_cache_size)
+
+    async def extract_text(self, document_bytes: bytes) -> str:
+        """Extract text from a document using AWS Textract."""
+        cache_key = _document_digest(document_bytes)
+        cached = self._text_cache.get(cache_key)
+        if cached is not None:
+            logger.info("OCR text served from cache", doc_size=len(document_bytes))
+            return cached
+
+        # The synchronous API only reads the first page of a PDF
+        if self.s3 and _pdf_page_count(document_bytes) > 1:
+            text = await self._extract_multipage(document_bytes)
+        else:
+            text = await self._detect_document_text(document_bytes)
+
+        self._text_cache[cache_key] = text
+        return text
+
+    async def _detect_document_text(self, document_bytes: bytes) -> str:
+        """OCR a single-page document with the synchronous Textract API."""
+        log = logger.bind(doc_size=len(document_bytes))
+        log.info("Starting Textract extraction")
+
+        try:
+            # boto3 is blocking; run the round trip off the event loop
+            response = await asyncio.to_thread(
+                self.client.detect_document_text, Document={"Bytes": document_bytes}
+            )
+        except Exception as e:
+            log.error("Textract extraction failed", error_code=_aws_error_code(e), error=str(e))
+            raise OCRError(f"Failed to extract text: {str(e)}") from e
+
+        text = "\n".join(
+            block["Text"] for block in response.get("Blocks", ()) if block["BlockType"] == "LINE"
+        )
+        log.info("Extraction complete", char_count=len(text))
+
+        if not text.strip():
+            raise OCRError("No text extracted from document")
+
+        return text
+
+    async def extract_text_batch(self, documents: Sequence[bytes]) -> list[str]:
+        """Extract text from several documents, in input order."""
+        if not self.s3 or len(documents) < 2:
+            return await super().extract_text_batch(documents)
+
+        cache_keys = [_document_digest(doc) for doc in documents]
+        texts: dict[int, str] = {}
+        for i, key in enumerate(cache_keys):
+            if (cached := self._text_cache.get(key)) is not None:
+                texts[i] = cached
+        pending = [i for i in range(len(documents)) if i not in texts]
+        logger.info("Starting Textract batch", documents=len(documents), uncached=len(pending))
+
+        # One asynchronous job per document; Textract runs them in parallel server-side,
+        # so the batch takes about as long as its slowest document
+        prefix = f"textract/{uuid.uuid4()}"
+        extracted = await asyncio.gather(
+            *(self._extract_multipage(documents[i], f"{prefix}/{i}") for i in pending)
+        )
+        for i, text in zip(pending, extracted, strict=True):
+            self._text_cache[cache_keys[i]] = texts[i] = text
+        return [texts[i] for i in range(len(documents))]
+
+    async def _extract_multipage(self, document_bytes: bytes, key: str | None = None) -> str:
+        """Stage a document in S3 and OCR it with the asynchronous Textract API."""
+        s3 = self.s3
+        if s3 is None:
+            raise OCRError("Multi-page OCR needs TEXTRACT_S3_BUCKET to stage documents")
+        bucket = settings.textract_s3_bucket
+        key = key or f"textract/{uuid.uuid4()}"
+        try:
+            await asyncio.to_thread(s3.put_object, Bucket=bucket, Key=key, Body=document_bytes)
+        except Exception as e:
+            logger.error(
+                "S3 upload failed", bucket=bucket, error_code=_aws_error_code(e), error=str(e)
+            )
+            raise OCRError(f"Failed to stage document: {str(e)}") from e
+
+        try:
+            return await self.extract_text_async_doc(bucket, key)
+        finally:
+            try:
+                await asyncio.to_thread(s3.delete_object, Bucket=bucket, Key=key)
+            except Exception as e:
+                logger.warning("Failed to delete staged document", key=key, error=str(e))
+
+    async def extract_text_async_doc(
+        self,
+        s3_bucket: str,
+        s3_key: str,
+        poll_interval: float = 1.0,
+        max_poll_interval: float = 10.0,
+        timeout: float = 300.0,
+    ) -> str:
+        """Extract text from a multi-page document in S3 using asynchronous Textract."""
+        log = logger.bind(s3_bucket=s3_bucket, s3_key=s3_key)
+        log.info("Starting Textract document text detection")
+
+        try:
+            job = await asyncio.to_thread(
+                self.client.start_document_text_detection,
+                DocumentLocation={"S3Object": {"Bucket": s3_bucket, "Name": s3_key}},
+            )
+            job_id = job["JobId"]
+
+            # Poll with exponential backoff until the job leaves IN_PROGRESS
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while True:
+                await asyncio.sleep(poll_interval)
+                response = await asyncio.to_thread(
+                    self.client.get_document_text_detection, JobId=job_id
+                )
+                if response["JobStatus"] != "IN_PROGRESS":
+                    break
+                if loop.time() > deadline:
+                    raise OCRError(f"Textract job {job_id} timed out")
+                poll_interval = min(poll_interval * 2, max_poll_interval)
+
+            if response["JobStatus"] == "FAILED":
+                raise OCRError(
+                    f"Textract job {job_id} failed: {response.get('StatusMessage', 'unknown')}"
+                )
+
+            # Results are paginated; collect LINE blocks across every page
+            page_count = response.get("DocumentMetadata", {}).get("Pages")
+            lines: list[str] = []
+            while True:
+                lines.extend(
+                    block["Text"]
+                    for block in response.get("Blocks", ())
+                    if block["BlockType"] == "LINE"
+                )
+                next_token = response.get("NextToken")
+                if not next_token:
+                    break
+                response = await asyncio.to_thread(
+                    self.client.get_document_text_detection, JobId=job_id, NextToken=next_token
+                )
+        except OCRError:
+            raise
+        except Exception as e:
+            log.error(
+                "Textract document text detection failed",
+                error_code=_aws_error_code(e),
+                error=str(e),
+            )
+            raise OCRError(f"Failed to extract text: {str(e)}") from e
+
+        text = "\n".join(lines)
+        log.info(
+            "Extraction complete",
+            page_count=page_count,
+            char_count=len(text),
+        )
+
+        if not text.strip():
+            raise OCRError("No text extracted from document")
+
+        return text
+
+
+def _document_digest(document_bytes: bytes) -> str:
+    """Key a document by content for the OCR cache."""
+    return hashlib.blake2b(document_bytes, digest_size=16).hexdigest()
+
+
+def _pdf_page_count(document_bytes: bytes) -> int:
+    """Estimate the page count of a PDF; non-PDF documents count as one page."""
+    if not document_bytes.startswith(b"%PDF"):
+        return 1
+    return len(_PDF_PAGE_RE.findall(document_bytes))
+
+
+class MockOCRProvider(OCRProvider):
+    """Mock OCR provider for testing without AWS credentials."""
+
+    async def extract_text(self, document_bytes: bytes) -> str:
+        """Return mock denial letter text for testing."""
+        logger.info("Using mock OCR provider")
+        return _MOCK_DENIAL_TEXT
+
+
+@lru_cache(maxsize=1)
 def get_ocr_provider() -> OCRProvider:
-    """Factory function to get the configured OCR provider."""
+    """Factory function to get the configured (shared) OCR provider."""
     # Use mock provider if AWS credentials are not configured
     if not settings.aws_access_key_id or not settings.aws_secret_access_key:
         logger.warning("AWS credentials not configured, using mock OCR provider")
@@ -1,20 +1,61 @@
 """Appeal letter templates for different denial reasons."""
 
-TEMPLATES = {
-    "medical_necessity": """
-RE: Appeal for Denial of Prior Authorization - Medical Necessity
-Date: {current_date}
+from collections.abc import Mapping
+from string import Formatter
+from types import MappingProxyType
 
-Member: {patient_name}
+# A template pre-parsed into (literal, field) pairs; field is None for trailing text
+CompiledTemplate = tuple[tuple[str, str | None], ...]
+
+# Header and signature lines shared by every letter
+_MEMBER_LINES = """Member: {patient_name}
 Member ID: {member_id}
 Claim Number: {claim_number}
-Date of Service: {service_date}
-Procedure: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
+"""
+_SIGNATURE_LINES = """{treating_physician}
+[CREDENTIALS]
+[PRACTICE NAME]
+"""
+_ENCLOSURES = """
+Enclosures:
+{required_documents}
+"""
 
-Dear {payer_name} Appeals Department,
 
-I am writing to formally appeal the denial of prior authorization for {procedure_description} for the above-referenced patient. The denial letter dated {denial_date} indicates the procedure was denied due to lack of demonstrated medical necessity. We respectfully disagree with this determination and request an expedited review.
+def _letter(
+    subject: str,
+    body: str,
+    *,
+    procedure_label: str = "Procedure",
+    service_date: bool = False,
+    provider: bool = False,
+    closing: str = "Sincerely,",
+    contact: str = "[CONTACT INFORMATION]\n",
+) -> str:
+    """Wrap a reason-specific body in the shared letter header and signature block."""
+    return "".join(
+        (
+            f"\nRE: {subject}\nDate: {{current_date}}\n\n",
+            _MEMBER_LINES,
+            "Date of Service: {service_date}\n" if service_date else "",
+            procedure_label,
+            ": {procedure_code} - {procedure_description}\n",
+            "Provider: {treating_physician}\n" if provider else "",
+            "Diagnosis: {diagnosis_codes}\n\nDear {payer_name} Appeals Department,\n\n",
+            body,
+            f"\n\n{closing}\n\n",
+            _SIGNATURE_LINES,
+            contact,
+            _ENCLOSURES,
+        )
+    )
+
+
+TEMPLATES: Mapping[str, str] = MappingProxyType(
+    {
+        "medical_necessity": _letter(
+            "Appeal for Denial of Prior Authorization - Medical Necessity",
+            """I am writing to formally appeal the denial of prior authorization for {procedure_description} for the above-referenced patient. The denial letter dated {denial_date} indicates the procedure was denied due to lack of demonstrated medical necessity. We respectfully disagree with this determination and request an expedited review.
 
 CLINICAL SUMMARY:
 
@@ -46,34 +87,14 @@ REQUEST FOR ACTION:
 
 Based on the clinical evidence presented, we request that {payer_name} reverse the denial and authorize {procedure_description} for {patient_name}. Given the patient's clinical status and the potential for deterioration without treatment, we request expedited review within 72 hours per applicable regulations.
 
-Please contact our office at [PHONE] if additional clinical documentation is required to support this appeal.
-
-Respectfully submitted,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[ADDRESS]
-[PHONE/FAX]
-[NPI NUMBER]
-
-Enclosures:
-{required_documents}
-""",
-
-    "step_therapy_required": """
-RE: Appeal for Step Therapy Exception Request
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure/Medication: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to request a step therapy exception for {procedure_description} for the above-referenced patient. The denial dated {denial_date} requires completion of step therapy protocols before authorization. We request an exception based on the clinical documentation provided below.
+Please contact our office at [PHONE] if additional clinical documentation is required to support this appeal.""",
+            service_date=True,
+            closing="Respectfully submitted,",
+            contact="[ADDRESS]\n[PHONE/FAX]\n[NPI NUMBER]\n",
+        ),
+        "step_therapy_required": _letter(
+            "Appeal for Step Therapy Exception Request",
+            """I am writing to request a step therapy exception for {procedure_description} for the above-referenced patient. The denial dated {denial_date} requires completion of step therapy protocols before authorization. We request an exception based on the clinical documentation provided below.
 
 STEP THERAPY EXCEPTION CRITERIA MET:
 
@@ -107,32 +128,12 @@ Based on the patient's treatment history and clinical presentation, {procedure_d
 
 REQUEST:
 
-We respectfully request that {payer_name} grant a step therapy exception and authorize {procedure_description} for {patient_name}. The clinical documentation demonstrates that step therapy requirements have been satisfied or that an exception is medically appropriate.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "not_covered": """
-RE: Appeal for Coverage Determination - Benefit Coverage Dispute
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to appeal the denial of coverage for {procedure_description}, which was denied on {denial_date} as "not a covered benefit." We believe this determination is incorrect and request a review of coverage under the patient's plan.
+We respectfully request that {payer_name} grant a step therapy exception and authorize {procedure_description} for {patient_name}. The clinical documentation demonstrates that step therapy requirements have been satisfied or that an exception is medically appropriate.""",
+            procedure_label="Procedure/Medication",
+        ),
+        "not_covered": _letter(
+            "Appeal for Coverage Determination - Benefit Coverage Dispute",
+            """I am writing to appeal the denial of coverage for {procedure_description}, which was denied on {denial_date} as "not a covered benefit." We believe this determination is incorrect and request a review of coverage under the patient's plan.
 
 COVERAGE ANALYSIS:
 
@@ -164,33 +165,11 @@ We request that {payer_name}:
 2. Provide specific plan language supporting the denial if coverage is not available
 3. Authorize the requested procedure if coverage is confirmed
 
-Please respond within the timeframes required by applicable regulations.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "out_of_network": """
-RE: Appeal for Out-of-Network Exception/Gap Exception Request
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure: {procedure_code} - {procedure_description}
-Provider: {treating_physician}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to request an out-of-network exception for services provided by {treating_physician} for {procedure_description}. The claim was denied on {denial_date} due to out-of-network status. We request in-network benefits be applied based on the following circumstances.
+Please respond within the timeframes required by applicable regulations.""",
+        ),
+        "out_of_network": _letter(
+            "Appeal for Out-of-Network Exception/Gap Exception Request",
+            """I am writing to request an out-of-network exception for services provided by {treating_physician} for {procedure_description}. The claim was denied on {denial_date} due to out-of-network status. We request in-network benefits be applied based on the following circumstances.
 
 GROUNDS FOR NETWORK EXCEPTION:
 
@@ -227,32 +206,12 @@ We request that {payer_name} authorize {procedure_description} with in-network b
 
 1. Names and contact information of in-network providers offering this service
 2. Confirmation that identified providers are accepting new patients
-3. Timeline for patient access to in-network care
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "missing_information": """
-RE: Appeal with Additional Documentation - Previously Denied for Missing Information
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am resubmitting the prior authorization request for {procedure_description}, which was denied on {denial_date} due to missing or insufficient documentation. This appeal includes all requested documentation to support authorization.
+3. Timeline for patient access to in-network care""",
+            provider=True,
+        ),
+        "missing_information": _letter(
+            "Appeal with Additional Documentation - Previously Denied for Missing Information",
+            """I am resubmitting the prior authorization request for {procedure_description}, which was denied on {denial_date} due to missing or insufficient documentation. This appeal includes all requested documentation to support authorization.
 
 ORIGINAL DENIAL REASON:
 
@@ -281,32 +240,11 @@ REQUEST:
 
 With the complete documentation now provided, we request that {payer_name} approve the prior authorization for {procedure_description}. All previously identified documentation gaps have been addressed in this submission.
 
-Please contact our office if any additional information is required.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "experimental_treatment": """
-RE: Appeal for Coverage of Treatment Denied as Experimental/Investigational
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Procedure/Treatment: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to appeal the denial of {procedure_description}, which was denied on {denial_date} as "experimental" or "investigational." We respectfully disagree with this characterization and provide evidence that this treatment is established, effective, and appropriate for {patient_name}.
+Please contact our office if any additional information is required.""",
+        ),
+        "experimental_treatment": _letter(
+            "Appeal for Coverage of Treatment Denied as Experimental/Investigational",
+            """I am writing to appeal the denial of {procedure_description}, which was denied on {denial_date} as "experimental" or "investigational." We respectfully disagree with this characterization and provide evidence that this treatment is established, effective, and appropriate for {patient_name}.
 
 TREATMENT STATUS - NOT EXPERIMENTAL:
 
@@ -345,32 +283,12 @@ Based on the substantial evidence that {procedure_description} is established, e
 
 1. Reclassify this treatment as non-experimental
 2. Authorize the requested procedure for {patient_name}
-3. If denied, provide the specific clinical criteria used in the determination
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "quantity_limit": """
-RE: Appeal for Quantity Limit Exception
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Medication/Supply: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to request a quantity limit exception for {procedure_description} for the above-referenced patient. The prescription/order was denied on {denial_date} due to quantity limits. We request an exception based on clinical necessity.
+3. If denied, provide the specific clinical criteria used in the determination""",
+            procedure_label="Procedure/Treatment",
+        ),
+        "quantity_limit": _letter(
+            "Appeal for Quantity Limit Exception",
+            """I am writing to request a quantity limit exception for {procedure_description} for the above-referenced patient. The prescription/order was denied on {denial_date} due to quantity limits. We request an exception based on clinical necessity.
 
 CURRENT QUANTITY LIMIT:
 [Specify current allowed quantity]
@@ -400,33 +318,12 @@ FDA/MANUFACTURER DOSING:
 
 REQUEST:
 
-We request that {payer_name} approve a quantity limit exception to allow [REQUESTED QUANTITY] of {procedure_description} for {patient_name}. This quantity is medically necessary for adequate treatment of the patient's condition.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "prior_auth_required": """
-RE: Retroactive Prior Authorization Request / Appeal for Timely Filing
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Date of Service: {service_date}
-Procedure: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to request retroactive prior authorization for {procedure_description} provided on {service_date}. The claim was denied on {denial_date} because prior authorization was not obtained before the service. We request approval based on the circumstances below.
+We request that {payer_name} approve a quantity limit exception to allow [REQUESTED QUANTITY] of {procedure_description} for {patient_name}. This quantity is medically necessary for adequate treatment of the patient's condition.""",
+            procedure_label="Medication/Supply",
+        ),
+        "prior_auth_required": _letter(
+            "Retroactive Prior Authorization Request / Appeal for Timely Filing",
+            """I am writing to request retroactive prior authorization for {procedure_description} provided on {service_date}. The claim was denied on {denial_date} because prior authorization was not obtained before the service. We request approval based on the circumstances below.
 
 REASON PRIOR AUTHORIZATION WAS NOT OBTAINED:
 
@@ -454,33 +351,12 @@ We request that {payer_name}:
 1. Grant retroactive authorization for the service provided
 2. Process the claim with appropriate benefits applied
 
-The clinical documentation demonstrates the service was medically necessary and would have been authorized had the request been submitted prospectively.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-""",
-
-    "default": """
-RE: Appeal for Prior Authorization Denial
-Date: {current_date}
-
-Member: {patient_name}
-Member ID: {member_id}
-Claim Number: {claim_number}
-Date of Service: {service_date}
-Procedure: {procedure_code} - {procedure_description}
-Diagnosis: {diagnosis_codes}
-
-Dear {payer_name} Appeals Department,
-
-I am writing to formally appeal the denial of prior authorization for {procedure_description}, denied on {denial_date}. The denial stated:
+The clinical documentation demonstrates the service was medically necessary and would have been authorized had the request been submitted prospectively.""",
+            service_date=True,
+        ),
+        "default": _letter(
+            "Appeal for Prior Authorization Denial",
+            """I am writing to formally appeal the denial of prior authorization for {procedure_description}, denied on {denial_date}. The denial stated:
 
 "{denial_reason_text}"
 
@@ -512,19 +388,11 @@ The enclosed materials provide additional clinical support for this request.
 
 REQUEST:
 
-We request that {payer_name} reverse the denial and authorize {procedure_description} for {patient_name}. Please contact our office if additional information is needed to process this appeal.
-
-Sincerely,
-
-{treating_physician}
-[CREDENTIALS]
-[PRACTICE NAME]
-[CONTACT INFORMATION]
-
-Enclosures:
-{required_documents}
-"""
-}
+We request that {payer_name} reverse the denial and authorize {procedure_description} for {patient_name}. Please contact our office if additional information is needed to process this appeal.""",
+            service_date=True,
+        ),
+    }
+)
 
 
 def get_template(denial_reason: str) -> str:
@@ -532,69 +400,102 @@ def get_template(denial_reason: str) -> str:
     return TEMPLATES.get(denial_reason, TEMPLATES["default"])
 
 
-def get_required_documents(denial_reason: str) -> list[str]:
-    """Get required documents based on denial reason."""
-    base_docs = [
-        "Copy of denial letter",
-        "Patient insurance card (front and back)",
-    ]
+def compile_template(template: str) -> CompiledTemplate:
+    """Parse a format-string template once into its literal and field segments."""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
+
+
+# Parsed once at import so rendering never re-lexes the template text
+_COMPILED_TEMPLATES: Mapping[str, CompiledTemplate] = MappingProxyType(
+    {reason: compile_template(template) for reason, template in TEMPLATES.items()}
+)
 
-    reason_specific = {
-        "medical_necessity": [
+
+def get_compiled_template(denial_reason: str) -> CompiledTemplate:
+    """Get the pre-parsed template for a denial reason."""
+    return _COMPILED_TEMPLATES.get(denial_reason, _COMPILED_TEMPLATES["default"])
+
+
+def render_compiled(compiled: CompiledTemplate, context: Mapping[str, object]) -> str:
+    """Fill a pre-parsed template; equivalent to format_map on its source text."""
+    return "".join(
+        literal + str(context[field]) if field is not None else literal
+        for literal, field in compiled
+    )
+
+
+_BASE_REQUIRED_DOCUMENTS: tuple[str, ...] = (
+    "Copy of denial letter",
+    "Patient insurance card (front and back)",
+)
+
+_REASON_REQUIRED_DOCUMENTS: Mapping[str, tuple[str, ...]] = MappingProxyType(
+    {
+        "medical_necessity": (
             "Physician letter of medical necessity",
             "Relevant clinical notes and history",
             "Lab results and diagnostic imaging",
             "Peer-reviewed literature supporting treatment",
             "Treatment plan documentation",
-        ],
-        "step_therapy_required": [
+        ),
+        "step_therapy_required": (
             "Documentation of all prior treatments attempted",
             "Clinical notes showing treatment failures or adverse reactions",
             "Pharmacy records showing previous medications filled",
             "Documentation of contraindications (if applicable)",
-        ],
-        "not_covered": [
+        ),
+        "not_covered": (
             "Summary of Benefits and Coverage (SBC)",
             "Evidence of Coverage (EOC) relevant sections",
             "Documentation supporting benefit category classification",
             "Any applicable state mandate documentation",
-        ],
-        "out_of_network": [
+        ),
+        "out_of_network": (
             "Documentation of in-network provider search",
             "Evidence of network inadequacy",
             "Continuity of care documentation",
             "Provider qualifications/credentials",
-        ],
-        "missing_information": [
+        ),
+        "missing_information": (
             "All previously submitted documentation",
             "Specifically requested missing documents",
             "Updated clinical notes",
             "Any additional supporting materials",
-        ],
-        "experimental_treatment": [
+        ),
+        "experimental_treatment": (
             "FDA approval documentation",
             "Published peer-reviewed clinical studies",
             "Clinical practice guidelines",
             "Professional society position statements",
             "Evidence of coverage by other major insurers",
-        ],
-        "quantity_limit": [
+        ),
+        "quantity_limit": (
             "Physician justification for quantity",
             "Treatment protocol documentation",
             "Disease severity documentation",
             "FDA/manufacturer dosing guidelines",
-        ],
-        "prior_auth_required": [
+        ),
+        "prior_auth_required": (
             "Documentation of emergency/urgency (if applicable)",
             "Clinical notes from date of service",
             "Evidence of medical necessity",
             "Explanation for lack of prospective authorization",
-        ],
+        ),
     }
+)
+
+_DEFAULT_REASON_DOCUMENTS: tuple[str, ...] = (
+    "Supporting clinical documentation",
+    "Physician statement",
+)
+
+# Full per-reason lists, concatenated once at import
+_REQUIRED_DOCUMENTS: Mapping[str, tuple[str, ...]] = MappingProxyType(
+    {reason: _BASE_REQUIRED_DOCUMENTS + docs for reason, docs in _REASON_REQUIRED_DOCUMENTS.items()}
+)
+_DEFAULT_REQUIRED_DOCUMENTS = _BASE_REQUIRED_DOCUMENTS + _DEFAULT_REASON_DOCUMENTS
 
-    specific_docs = reason_specific.get(denial_reason, [
-        "Supporting clinical documentation",
-        "Physician statement",
-    ])
 
-    return base_docs + specific_docs
+def get_required_documents(denial_reason: str) -> tuple[str, ...]:
+    """Get required documents based on denial reason (a shared, immutable tuple)."""
+    return _REQUIRED_DOCUMENTS.get(denial_reason, _DEFAULT_REQUIRED_DOCUMENTS)
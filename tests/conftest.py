@@ -0,0 +1,159 @@
+"""Shared test fixtures."""
+
+from collections.abc import AsyncIterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.models import DenialExtraction, DenialReason, PatientContext
+from src.core.services import AppealGenerationService
+from src.integrations.ocr import MockOCRProvider
+
+# Sample denial letter text for testing
+SAMPLE_DENIAL = """
+INSURANCE COMPANY NAME: Aetna Health Insurance
+Date: January 5, 2025
+
+RE: DENIAL OF PRIOR AUTHORIZATION
+Member ID: AET987654321
+Claim Number: CLM-2025-123456
+
+Procedure: 64483 - Lumbar Epidural Steroid Injection
+Diagnosis: M54.5 - Low back pain
+
+REASON FOR DENIAL:
+This request has been denied due to lack of medical necessity. The submitted documentation does not demonstrate that conservative treatment options have been exhausted.
+
+You have the right to appeal within 60 days.
+
+Medical Review Department
+Aetna Health Insurance
+"""
+
+
+class MockLLMClient:
+    """Mock LLM client for testing without API calls."""
+
+    def __init__(self) -> None:
+        self.extract_calls = 0
+
+    async def extract_denial_info(self, denial_text: str) -> DenialExtraction:
+        """Return mock extraction."""
+        self.extract_calls += 1
+        return DenialExtraction(
+            payer_name="Aetna Health Insurance",
+            denial_reason=DenialReason.MEDICAL_NECESSITY,
+            denial_reason_text="lack of medical necessity",
+            procedure_codes=["64483"],
+            diagnosis_codes=["M54.5"],
+            member_id="AET987654321",
+            claim_number="CLM-2025-123456",
+            raw_text=denial_text,
+        )
+
+    async def extract_denials_batch(self, denial_texts: list[str]) -> list[DenialExtraction]:
+        """Return mock extractions, one per text."""
+        return [await self.extract_denial_info(text) for text in denial_texts]
+
+    async def extract_and_appeal(
+        self,
+        denial_text: str,
+        patient_context: PatientContext | None = None,
+    ) -> tuple[DenialExtraction, str]:
+        """Return mock extraction and appeal letter."""
+        denial = await self.extract_denial_info(denial_text)
+        return denial, await self.generate_appeal(denial, patient_context)
+
+    async def generate_many(
+        self,
+        denials: list[DenialExtraction],
+        patient_contexts: list[PatientContext | None] | None = None,
+        concurrency: int | None = None,
+    ) -> list[str]:
+        """Return mock appeal letters, one per denial."""
+        return [await self.generate_appeal(denial) for denial in denials]
+
+    async def generate_appeal(
+        self,
+        denial: DenialExtraction,
+        patient_context: PatientContext | None = None,
+    ) -> str:
+        """Return mock appeal letter."""
+        return f"""
+RE: Appeal for Denial of Prior Authorization - Medical Necessity
+Member ID: {denial.member_id}
+Claim Number: {denial.claim_number}
+
+Dear {denial.payer_name} Appeals Department,
+
+I am writing to formally appeal the denial of prior authorization.
+
+This is a test appeal letter generated by MockLLMClient.
+
+Sincerely,
+[Physician Name]
+"""
+
+    async def submit_appeal_batch(
+        self,
+        denials: list[DenialExtraction],
+        patient_contexts: list[PatientContext | None] | None = None,
+    ) -> str:
+        """Record the batch and return a mock batch id."""
+        self.batched_denials = denials
+        return "msgbatch_mock"
+
+    async def poll_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 30.0,
+    ) -> AsyncIterator[tuple[str, str | None]]:
+        """Yield mock results; the first request fails."""
+        for i, denial in enumerate(self.batched_denials):
+            yield str(i), None if i == 0 else await self.generate_appeal(denial)
+
+    async def stream_appeal(
+        self,
+        denial: DenialExtraction,
+        patient_context: PatientContext | None = None,
+    ) -> AsyncIterator[str]:
+        """Stream the mock appeal letter line by line."""
+        letter = await self.generate_appeal(denial, patient_context)
+        for line in letter.splitlines(keepends=True):
+            yield line
+
+
+@pytest.fixture
+def mock_ocr():
+    """Create mock OCR provider."""
+    return MockOCRProvider()
+
+
+@pytest.fixture
+def mock_llm():
+    """Create mock LLM client."""
+    return MockLLMClient()
+
+
+@pytest.fixture
+def appeal_service(mock_ocr, mock_llm):
+    """Create appeal service with mock dependencies."""
+    return AppealGenerationService(
+        ocr_provider=mock_ocr,
+        llm_client=mock_llm,
+    )
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create one API test client for the session, running app startup and shutdown once."""
+    from src.api.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def sample_denial():
+    """Sample denial letter text."""
+    return SAMPLE_DENIAL
@@ -1,21 +1,26 @@
 """Tests for API endpoints."""
 
-import pytest
-from fastapi.testclient import TestClient
+import orjson
 
 from src.api.main import app
+from src.api.routes.appeals import MAX_UPLOAD_REQUEST_BYTES, _split_csv, get_appeal_service
 
-client = TestClient(app)
 
-
-def test_health_check():
+def test_health_check(client):
     """Test health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+    assert response.content == b'{"status":"healthy"}'
+
+
+def test_debug_pool_status(client):
+    """Test the connection pool status endpoint."""
+    response = client.get("/debug/pool")
+    assert response.status_code == 200
+    assert "Pool size" in response.json()["pool"]
 
 
-def test_generate_appeal_from_text_validation():
+def test_generate_appeal_from_text_validation(client):
     """Test that text endpoint validates input."""
     # Too short denial text should fail
     response = client.post(
@@ -26,8 +31,119 @@ def test_generate_appeal_from_text_validation():
     assert "at least 50 characters" in response.json()["detail"]
 
 
-def test_get_appeal_not_found():
+def test_generate_appeal_from_text(client, appeal_service, sample_denial):
+    """Test the text endpoint end to end with mock dependencies."""
+    app.dependency_overrides[get_appeal_service] = lambda: appeal_service
+    try:
+        response = client.post("/api/v1/appeals/text", json={"denial_text": sample_denial})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["denial_info"]["payer_name"] == "Aetna Health Insurance"
+    assert "Copy of denial letter" in body["required_documents"]
+    assert body["confidence_score"] > 0
+
+
+def test_stream_appeal_from_text(client, appeal_service, sample_denial):
+    """Test the streaming endpoint emits appeal, token and done events."""
+    app.dependency_overrides[get_appeal_service] = lambda: appeal_service
+    try:
+        response = client.post("/api/v1/appeals/text/stream", json={"denial_text": sample_denial})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (event.split("\n")[0].removeprefix("event: "), event.split("\ndata: ", 1)[1])
+        for event in response.text.strip().split("\n\n")
+    ]
+    assert events[0][0] == "appeal"
+    appeal = orjson.loads(events[0][1])
+    assert appeal["denial_info"]["payer_name"] == "Aetna Health Insurance"
+    letter = "".join(orjson.loads(data) for name, data in events if name == "token")
+    assert "Dear Aetna Health Insurance Appeals Department" in letter
+    assert events[-1] == ("done", orjson.dumps({"appeal_id": appeal["appeal_id"]}).decode())
+
+
+def test_get_appeal_not_found(client):
     """Test getting non-existent appeal."""
     response = client.get("/api/v1/appeals/nonexistent-id")
     assert response.status_code == 200
-    assert response.json()["status"] == "not_found"
+    assert orjson.loads(response.content)["status"] == "not_found"
+
+
+def test_list_payers(client):
+    """Test payer listing returns the seeded payers."""
+    response = client.get("/api/v1/payers")
+    assert response.status_code == 200
+    names = [p["name"] for p in response.json()["payers"]]
+    assert "Aetna" in names
+    assert "Kaiser Permanente" in names
+
+
+def test_payer_requirements_lookup(client):
+    """Test payer lookup by alias and by partial name."""
+    response = client.get("/api/v1/payers/uhc/requirements")
+    assert response.json()["payer"] == "UnitedHealthcare"
+
+    response = client.get("/api/v1/payers/anthem/requirements")
+    assert response.json()["payer"] == "Blue Cross Blue Shield"
+
+    response = client.get("/api/v1/payers/unknown-payer/requirements")
+    assert response.json()["error"] == "Payer not found"
+
+
+def test_upload_rejects_oversized_file(client):
+    """Test that uploads over the size limit are rejected."""
+    response = client.post(
+        "/api/v1/appeals/upload",
+        files={"denial_letter": ("denial.pdf", b"0" * (10 * 1024 * 1024 + 1), "application/pdf")},
+    )
+    assert response.status_code == 400
+    assert "too large" in response.json()["detail"]
+
+
+def test_upload_rejects_oversized_content_length(client):
+    """Test that oversized uploads are refused from Content-Length, before the body is parsed."""
+    # Not multipart at all: only the header check can answer 400 rather than 422
+    response = client.post(
+        "/api/v1/appeals/upload",
+        content=b"0" * (MAX_UPLOAD_REQUEST_BYTES + 1),
+        headers={"content-type": "application/octet-stream"},
+    )
+    assert response.status_code == 400
+    assert "too large" in response.json()["detail"]
+
+
+def test_split_csv_form_field():
+    """Test comma-separated form fields are trimmed and empty items dropped."""
+    assert _split_csv(" M54.5 , M17.11,, ") == ["M54.5", "M17.11"]
+    assert _split_csv(None) == []
+
+
+def test_upload_rejects_unsupported_content_type(client):
+    """Test that non-document uploads are rejected."""
+    response = client.post(
+        "/api/v1/appeals/upload",
+        files={"denial_letter": ("denial.txt", b"plain text", "text/plain")},
+    )
+    assert response.status_code == 400
+    assert "PDF, PNG, JPEG, or TIFF" in response.json()["detail"]
+
+
+def test_generate_appeal_from_text_rejects_oversized_input(client):
+    """Test that oversized text fields are rejected by request validation."""
+    response = client.post(
+        "/api/v1/appeals/text",
+        json={"denial_text": "x" * 200_001},
+    )
+    assert response.status_code == 422
+
+    response = client.post(
+        "/api/v1/appeals/text",
+        json={"denial_text": "x" * 100, "diagnosis_codes": ["M54.5"] * 51},
+    )
+    assert response.status_code == 422
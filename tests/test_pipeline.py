@@ -3,94 +3,20 @@
 import pytest
 
 from src.core.models import DenialExtraction, DenialReason, PatientContext
-from src.core.services import AppealGenerationService
-from src.integrations.ocr import MockOCRProvider
-
-# Sample denial letter text for testing
-SAMPLE_DENIAL = """
-INSURANCE COMPANY NAME: Aetna Health Insurance
-Date: January 5, 2025
-
-RE: DENIAL OF PRIOR AUTHORIZATION
-Member ID: AET987654321
-Claim Number: CLM-2025-123456
-
-Procedure: 64483 - Lumbar Epidural Steroid Injection
-Diagnosis: M54.5 - Low back pain
-
-REASON FOR DENIAL:
-This request has been denied due to lack of medical necessity. The submitted documentation does not demonstrate that conservative treatment options have been exhausted.
-
-You have the right to appeal within 60 days.
-
-Medical Review Department
-Aetna Health Insurance
-"""
-
-
-class MockLLMClient:
-    """Mock LLM client for testing without API calls."""
-
-    async def extract_denial_info(self, denial_text: str) -> DenialExtraction:
-        """Return mock extraction."""
-        return DenialExtraction(
-            payer_name="Aetna Health Insurance",
-            denial_reason=DenialReason.MEDICAL_NECESSITY,
-            denial_reason_text="lack of medical necessity",
-            procedure_codes=["64483"],
-            diagnosis_codes=["M54.5"],
-            member_id="AET987654321",
-            claim_number="CLM-2025-123456",
-            raw_text=denial_text,
-        )
-
-    async def generate_appeal(
-        self,
-        denial: DenialExtraction,
-        patient_context: PatientContext | None = None,
-    ) -> str:
-        """Return mock appeal letter."""
-        return f"""
-RE: Appeal for Denial of Prior Authorization - Medical Necessity
-Member ID: {denial.member_id}
-Claim Number: {denial.claim_number}
-
-Dear {denial.payer_name} Appeals Department,
-
-I am writing to formally appeal the denial of prior authorization.
-
-This is a test appeal letter generated by MockLLMClient.
-
-Sincerely,
-[Physician Name]
-"""
-
-
-@pytest.fixture
-def mock_ocr():
-    """Create mock OCR provider."""
-    return MockOCRProvider()
-
-
-@pytest.fixture
-def mock_llm():
-    """Create mock LLM client."""
-    return MockLLMClient()
-
-
-@pytest.fixture
-def appeal_service(mock_ocr, mock_llm):
-    """Create appeal service with mock dependencies."""
-    return AppealGenerationService(
-        ocr_provider=mock_ocr,
-        llm_client=mock_llm,
-    )
+from src.core.services import _classify_denial_reason
+from src.integrations.llm import _build_appeal_prompt, _extract_json_span
+from src.templates.appeal_templates import (
+    TEMPLATES,
+    get_compiled_template,
+    get_template,
+    render_compiled,
+)
 
 
 @pytest.mark.asyncio
-async def test_process_denial_from_text(appeal_service):
+async def test_process_denial_from_text(appeal_service, sample_denial):
     """Test processing denial from text input."""
-    appeal = await appeal_service.process_denial_from_text(SAMPLE_DENIAL)
+    appeal = await appeal_service.process_denial_from_text(sample_denial)
 
     assert appeal.id is not None
     assert appeal.letter_content is not None
@@ -101,7 +27,7 @@ async def test_process_denial_from_text(appeal_service):
 
 
 @pytest.mark.asyncio
-async def test_process_denial_with_patient_context(appeal_service):
+async def test_process_denial_with_patient_context(appeal_service, sample_denial):
     """Test processing denial with additional patient context."""
     patient_context = PatientContext(
         patient_name="Jane Doe",
@@ -114,7 +40,7 @@ async def test_process_denial_with_patient_context(appeal_service):
     )
 
     appeal = await appeal_service.process_denial_from_text(
-        SAMPLE_DENIAL,
+        sample_denial,
         patient_context,
     )
 
@@ -123,9 +49,9 @@ async def test_process_denial_with_patient_context(appeal_service):
 
 
 @pytest.mark.asyncio
-async def test_required_documents_medical_necessity(appeal_service):
+async def test_required_documents_medical_necessity(appeal_service, sample_denial):
     """Test that medical necessity denials include appropriate required docs."""
-    appeal = await appeal_service.process_denial_from_text(SAMPLE_DENIAL)
+    appeal = await appeal_service.process_denial_from_text(sample_denial)
 
     required_docs = appeal.required_attachments
     assert "Copy of denial letter" in required_docs
@@ -146,6 +72,85 @@ async def test_process_denial_from_document(appeal_service):
     assert appeal.letter_content is not None
 
 
+@pytest.mark.asyncio
+async def test_process_denials_batch(appeal_service, mock_llm):
+    """Test batch processing returns one appeal per document, reusing the cache."""
+    single = await appeal_service.process_denial(b"first document")
+    appeals = await appeal_service.process_denials(
+        [b"first document", b"second document", b"third document"]
+    )
+
+    assert len(appeals) == 3
+    assert appeals[0].letter_content == single.letter_content
+    assert len({appeal.id for appeal in appeals}) == 3
+    assert mock_llm.extract_calls == 3  # one for the single call, two for the batch
+
+
+@pytest.mark.asyncio
+async def test_process_denials_batch_mode(appeal_service):
+    """Test batch-mode generation, with failed batch requests retried directly."""
+    appeals = await appeal_service.process_denials(
+        [b"first document", b"second document"], mode="batch"
+    )
+
+    assert len(appeals) == 2
+    assert all("Dear Aetna Health Insurance" in appeal.letter_content for appeal in appeals)
+
+
+@pytest.mark.asyncio
+async def test_repeat_denial_served_from_cache(appeal_service, mock_llm, sample_denial):
+    """Test that resubmitting the same denial skips the LLM pipeline."""
+    first = await appeal_service.process_denial_from_text(sample_denial)
+    second = await appeal_service.process_denial_from_text(sample_denial)
+
+    assert mock_llm.extract_calls == 1
+    assert second.id != first.id
+    assert second.letter_content == first.letter_content
+
+    # Different patient context is a different cache entry
+    patient_context = PatientContext(patient_name="Jane Doe", procedure_code="64483")
+    await appeal_service.process_denial_from_text(sample_denial, patient_context)
+    assert mock_llm.extract_calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_extraction_is_not_cached(
+    appeal_service, mock_llm, sample_denial, monkeypatch
+):
+    """Test that an appeal built on an unparseable LLM reply is not served to retries."""
+    parsed_extraction = mock_llm.extract_denial_info
+
+    async def fallback_extraction(denial_text: str) -> DenialExtraction:
+        # What LLMClient.extract_denial_info returns when the reply is not valid JSON
+        mock_llm.extract_calls += 1
+        return DenialExtraction(raw_text=denial_text)
+
+    monkeypatch.setattr(mock_llm, "extract_denial_info", fallback_extraction)
+    degraded = await appeal_service.process_denial_from_text(sample_denial)
+    assert degraded.denial_extraction.payer_name is None
+
+    monkeypatch.setattr(mock_llm, "extract_denial_info", parsed_extraction)
+    retried = await appeal_service.process_denial_from_text(sample_denial)
+    assert mock_llm.extract_calls == 2
+    assert retried.denial_extraction.payer_name == "Aetna Health Insurance"
+
+
+@pytest.mark.asyncio
+async def test_stream_denial_from_text(appeal_service, mock_llm, sample_denial):
+    """Test that streaming yields metadata first, then the letter, and caches it."""
+    items = [item async for item in appeal_service.stream_denial_from_text(sample_denial)]
+
+    appeal, *chunks = items
+    assert appeal.letter_content == ""
+    assert appeal.denial_extraction.payer_name == "Aetna Health Insurance"
+    assert len(chunks) > 1
+    assert all(isinstance(chunk, str) for chunk in chunks)
+
+    cached = await appeal_service.process_denial_from_text(sample_denial)
+    assert mock_llm.extract_calls == 1
+    assert cached.letter_content == "".join(chunks)
+
+
 def test_confidence_score_calculation(appeal_service):
     """Test confidence score calculation based on extraction completeness."""
     # Full extraction should have high confidence
@@ -167,3 +172,91 @@ def test_confidence_score_calculation(appeal_service):
 
     score = appeal_service._calculate_confidence(minimal_extraction)
     assert score < 0.3  # Should be low
+
+
+def test_denial_flag_bits():
+    """Test the extraction-completeness bitmask used for confidence scoring."""
+    assert DenialExtraction(raw_text="test").to_flag_bits() == 0
+
+    extraction = DenialExtraction(
+        payer_name="Aetna",
+        denial_reason=DenialReason.MEDICAL_NECESSITY,
+        claim_number="CLM-123",
+        raw_text="test",
+    )
+    assert extraction.to_flag_bits() == 0b01000101
+
+
+def test_keyword_denial_classification(sample_denial):
+    """Test the local keyword classifier used when the LLM returns OTHER."""
+    assert _classify_denial_reason(sample_denial) == DenialReason.MEDICAL_NECESSITY
+    assert (
+        _classify_denial_reason("The provider is out-of-network for this plan.")
+        == DenialReason.OUT_OF_NETWORK
+    )
+    assert _classify_denial_reason("No reason given.") == DenialReason.OTHER
+
+
+def test_extract_json_span():
+    """Test the first balanced JSON value is found despite fences, prose and string braces."""
+    reply = '```json\n{"payer_name": "A}", "codes": {"x": "\\"{"}}\n```\nNote: {ignored}'
+    assert _extract_json_span(reply) == '{"payer_name": "A}", "codes": {"x": "\\"{"}}'
+    assert _extract_json_span('Result: [{"a": "]"}, {}] done', "[", "]") == '[{"a": "]"}, {}]'
+    assert _extract_json_span("no json here") is None
+    assert _extract_json_span('{"unterminated": 1') is None
+
+
+def test_denial_extraction_lenient_validation():
+    """Test LLM output with unknown reasons, bad dates and null lists still validates."""
+    extraction = DenialExtraction.model_validate(
+        {
+            "denial_reason": "not_a_reason",
+            "denial_date": "2025-01-05",
+            "appeal_deadline": "within 180 days",
+            "procedure_codes": None,
+            "raw_text": "test",
+        }
+    )
+    assert extraction.denial_reason == DenialReason.OTHER
+    assert extraction.denial_date.year == 2025
+    assert extraction.appeal_deadline is None
+    assert extraction.procedure_codes == []
+
+
+def test_appeal_prompt_member_id_fallbacks():
+    """Test the denial's member ID is used without patient context, else the context's."""
+    denial = DenialExtraction(member_id="AET987654321", raw_text="test")
+    assert "Member ID: AET987654321" in _build_appeal_prompt(denial, None)
+
+    context = PatientContext(patient_name="Jane Doe", procedure_code="64483", member_id="CTX1")
+    prompt = _build_appeal_prompt(DenialExtraction(raw_text="test"), context)
+    assert "Member ID: CTX1" in prompt
+
+    context = PatientContext(patient_name="Jane Doe", procedure_code="64483")
+    prompt = _build_appeal_prompt(DenialExtraction(raw_text="test"), context)
+    assert "Member ID: [MEMBER ID]" in prompt
+    assert "[PROCEDURE DESCRIPTION]" in prompt
+
+
+def test_render_matches_str_format():
+    """Test the pre-parsed renderer fills every template exactly like str.format."""
+    context = {
+        "current_date": "January 10, 2025",
+        "patient_name": "Jane Doe",
+        "member_id": "AET987654321",
+        "claim_number": "CLM-2025-123456",
+        "service_date": "January 2, 2025",
+        "procedure_code": "64483",
+        "procedure_description": "Lumbar Epidural Steroid Injection",
+        "diagnosis_codes": "M54.5",
+        "payer_name": "Aetna",
+        "denial_date": "January 5, 2025",
+        "denial_reason_text": "Lack of medical necessity",
+        "clinical_notes": "Chronic pain for 6 months",
+        "prior_treatments": "- Physical therapy",
+        "treating_physician": "Dr. Smith",
+        "required_documents": "- Copy of denial letter",
+    }
+    for reason in [*TEMPLATES, "unknown_reason"]:
+        rendered = render_compiled(get_compiled_template(reason), context)
+        assert rendered == get_template(reason).format(**context)
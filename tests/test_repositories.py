@@ -0,0 +1,146 @@
+"""Tests for the repository layer, against an in-memory SQLite database."""
+
+import re
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.core import repositories
+from src.core.database import Base
+from src.core.db_models import AppealRecord, PayerRecord, PayerRuleRecord
+from src.core.repositories import AppealRepository, PayerRepository, PayerRuleRepository
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+async def session_maker():
+    """Create the schema in a fresh in-memory database and clear the payer caches."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _add_regexp_replace(dbapi_connection, _):
+        # Used by the generated payers.name_normalized column
+        dbapi_connection.create_function(
+            "regexp_replace",
+            4,
+            lambda value, pattern, repl, _flags: re.sub(pattern, repl, value),
+            deterministic=True,
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    for cache in (
+        repositories._payer_id_by_name,
+        repositories._payer_by_id,
+        repositories._rules_by_criteria,
+    ):
+        cache.clear()
+
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _seed_payer(session_maker) -> str:
+    """Insert one payer with one rule; return the payer id."""
+    payer_id = str(uuid.uuid4())
+    async with session_maker() as session:
+        session.add(PayerRecord(id=payer_id, name="Aetna", aliases=["CVS Aetna"]))
+        session.add(PayerRuleRecord(id=str(uuid.uuid4()), payer_id=payer_id, rule_name="MRI"))
+        await session.commit()
+    return payer_id
+
+
+async def test_payer_cache_does_not_share_instances_across_sessions(session_maker):
+    """Test cached payers and rules are per-session copies, not the instance first loaded."""
+    payer_id = await _seed_payer(session_maker)
+
+    async with session_maker() as first:
+        payer = await PayerRepository(first).get_by_name("Aetna")
+        rules = await PayerRuleRepository(first).find_matching_rules(payer_id)
+        # Uncommitted, in-place edits in one session must not reach the cache
+        payer.appeals_phone = "1-800-555-0000"
+        payer.aliases.append("Aetna Health")
+        rules[0].rule_name = "changed"
+
+    async with session_maker() as second:
+        cached = await PayerRepository(second).get_by_name("Aetna")
+        cached_rules = await PayerRuleRepository(second).find_matching_rules(payer_id)
+
+        assert cached is not payer
+        assert cached in second
+        assert cached.appeals_phone is None
+        assert cached.aliases == ["CVS Aetna"]
+        assert [rule.rule_name for rule in cached.rules] == ["MRI"]
+        assert cached_rules[0] is not rules[0]
+        assert cached_rules[0].rule_name == "MRI"
+        assert cached_rules[0].payer.name == "Aetna"
+
+    async with session_maker() as third:
+        # Served from the cache again, without running a query
+        assert (await PayerRepository(third).get_by_id(payer_id)) is not cached
+
+
+async def test_appeal_count_evicts_cached_rules_for_the_payer(session_maker):
+    """Test rule snapshots do not keep serving a payer's pre-increment statistics."""
+    payer_id = await _seed_payer(session_maker)
+
+    async with session_maker() as session:
+        [rule] = await PayerRuleRepository(session).find_matching_rules(payer_id)
+        assert rule.payer.total_appeals == 0
+        await PayerRepository(session).increment_appeal_count(payer_id, successful=True)
+        await session.commit()
+
+    async with session_maker() as session:
+        [rule] = await PayerRuleRepository(session).find_matching_rules(payer_id)
+        assert rule.payer.total_appeals == 1
+        assert rule.payer.successful_appeals == 1
+
+
+async def _seed_appeals(session_maker, count: int) -> None:
+    """Insert count minimal appeal records, one minute apart."""
+    # Explicit timestamps: SQLite stores its server default in a different text format
+    start = datetime(2025, 1, 1, tzinfo=UTC)
+    async with session_maker() as session:
+        session.add_all(
+            AppealRecord(
+                id=str(uuid.uuid4()),
+                appeal_letter="Dear Appeals Department",
+                created_at=start + timedelta(minutes=i),
+            )
+            for i in range(count)
+        )
+        await session.commit()
+
+
+async def test_update_status_refreshes_a_loaded_record(session_maker):
+    """Test update_status returns the new status even when the session already holds the row."""
+    await _seed_appeals(session_maker, 1)
+    async with session_maker() as session:
+        repo = AppealRepository(session)
+        [loaded], _ = await repo.list_recent()
+        record = await repo.get_by_id(loaded.id)
+        assert record is not None and record.status == "generated"
+
+        updated = await repo.update_status(loaded.id, "submitted")
+
+        assert updated is record
+        assert record.status == "submitted"
+        assert await repo.update_status("missing-id", "submitted") is None
+
+
+async def test_list_recent_cursor_ends_with_the_last_page(session_maker):
+    """Test keyset paging returns no cursor once the last (full) page is reached."""
+    await _seed_appeals(session_maker, 4)
+    async with session_maker() as session:
+        repo = AppealRepository(session)
+        first, cursor = await repo.list_recent(limit=2)
+        assert len(first) == 2 and cursor is not None
+
+        second, cursor = await repo.list_recent(limit=2, cursor=cursor)
+        assert len(second) == 2 and cursor is None
+        assert {r.id for r in first}.isdisjoint(r.id for r in second)